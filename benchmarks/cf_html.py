@@ -0,0 +1,95 @@
+import argparse
+import html
+import os
+import re
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from PIL import Image
+from src.utils.artifact import RenderedArtifact
+from src.utils.document import build_cf_html, html_style
+from src.utils.latex import find_latex_equations
+
+def synthetic_images(count, width, height, seed=5):
+    rng = np.random.default_rng(seed)
+    images = []
+    for _ in range(count):
+        pixels = np.zeros((height, width, 4), dtype=np.uint8)
+        pixels[:, :, 3] = rng.integers(0, 2, size=(height, width), dtype=np.uint8) * 255
+        images.append(RenderedArtifact(Image.fromarray(pixels)))
+    return images
+
+def synthetic_text(count):
+    return "\n".join(f"Schritt {i}: für alle ε > 0 gilt $x_{{{i}}} \\le ε$ – siehe oben." for i in range(count))
+
+def legacy_cf_html(images, text, equations, color, font_size):
+    # The previous copy_images path: str concatenation, then character offsets.
+    html_content = html_style(color, font_size)
+    last_pos = 0
+    for image, match in zip(images, equations['matches']):
+        html_content += f'<span>{html.escape(text[last_pos:match["start"]]).replace(chr(10), "<br>")}</span>'
+        html_content += f'<img src="{image.data_uri()}" style="vertical-align: middle; margin: 2px 0;">'
+        last_pos = match['end']
+    html_content += f'<span>{html.escape(text[last_pos:]).replace(chr(10), "<br>")}</span>'
+    html_header = (
+        "Version:0.9\r\n"
+        "StartHTML:0000000105\r\n"
+        "EndHTML:{:010d}\r\n"
+        "StartFragment:0000000141\r\n"
+        "EndFragment:{:010d}\r\n"
+        "<html><body>\r\n"
+        "<!--StartFragment-->{}<!--EndFragment-->\r\n"
+        "</body></html>"
+    )
+    return html_header.format(
+        len(html_header) + len(html_content),
+        len(html_header) + len(html_content) - len("<!--EndFragment-->\r\n</body></html>"),
+        html_content
+    ).encode('utf-8')
+
+def offsets_valid(payload):
+    fields = {name: int(value) for name, value in re.findall(rb'(StartHTML|EndHTML|StartFragment|EndFragment):(\d{10})', payload)}
+    fields = {name.decode(): value for name, value in fields.items()}
+    return (payload[fields['StartHTML']:].startswith(b"<html>")
+            and payload[:fields['EndHTML']].endswith(b"</html>")
+            and payload[:fields['StartFragment']].endswith(b"<!--StartFragment-->")
+            and payload[fields['EndFragment']:].startswith(b"<!--EndFragment-->"))
+
+def measure(build, repeat):
+    build()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        payload = build()
+    elapsed = (time.perf_counter() - start) / repeat
+    tracemalloc.start()
+    build()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return payload, elapsed, peak
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the CF_HTML builder against string concatenation.")
+    parser.add_argument("--images", type=int, default=150)
+    parser.add_argument("--width", type=int, default=900)
+    parser.add_argument("--height", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    images = synthetic_images(args.images, args.width, args.height)
+    text = synthetic_text(args.images)
+    equations = find_latex_equations(text)
+    for image in images:
+        image.base64_bytes()
+    print(f"{args.images} images, {sum(image.payload_size for image in images) / 1024 / 1024:.1f} MB of base64, non-ASCII text")
+    for label, build in (("concatenation", lambda: legacy_cf_html(images, text, equations, "black", 12)),
+                         ("builder", lambda: build_cf_html(images, text, equations, "black", 12))):
+        payload, elapsed, peak = measure(build, args.repeat)
+        print(f"{label:<14} {elapsed * 1000:8.2f} ms  peak {peak / 1024 / 1024:7.1f} MB  payload {len(payload) / 1024 / 1024:6.1f} MB  "
+              f"offsets {'ok' if offsets_valid(payload) else 'WRONG'}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils.clipboard import ClipboardWatcher, MemoryClipboardBackend
+
+def drive(backend, bursts, burst_size, gap, pause, copied_at):
+    for burst in range(bursts):
+        for i in range(burst_size):
+            copied_at[f"burst {burst} copy {i} $x^{i}$"] = time.perf_counter()
+            backend.copy_text(f"burst {burst} copy {i} $x^{i}$")
+            time.sleep(gap)
+        time.sleep(pause)
+
+def main():
+    parser = argparse.ArgumentParser(description="Drive the clipboard watcher headlessly with bursts of copies.")
+    parser.add_argument("--bursts", type=int, default=20)
+    parser.add_argument("--burst-size", type=int, default=5)
+    parser.add_argument("--gap", type=float, default=0.02, help="Seconds between copies inside a burst")
+    parser.add_argument("--pause", type=float, default=0.4, help="Seconds between bursts")
+    parser.add_argument("--debounce", type=float, default=0.15)
+    args = parser.parse_args()
+
+    backend = MemoryClipboardBackend()
+    watcher = ClipboardWatcher(backend, debounce=args.debounce, timeout=0.5)
+    stop_event = threading.Event()
+    copied_at = {}
+    latencies = []
+    delivered = []
+
+    def consume():
+        for text in watcher.changes(stop_event):
+            latencies.append(time.perf_counter() - copied_at[text])
+            delivered.append(text)
+
+    consumer = threading.Thread(target=consume, daemon=True)
+    consumer.start()
+    drive(backend, args.bursts, args.burst_size, args.gap, args.pause, copied_at)
+    stop_event.set()
+    consumer.join(timeout=2.0)
+
+    print(f"copies: {len(copied_at)}  delivered: {len(delivered)}  coalesced: {watcher.changes_coalesced}")
+    if latencies:
+        print(f"latency after last copy of a burst: median {statistics.median(latencies) * 1000:.1f} ms, "
+              f"max {max(latencies) * 1000:.1f} ms (debounce {args.debounce * 1000:.0f} ms)")
+
+if __name__ == "__main__":
+    main()
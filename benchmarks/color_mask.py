@@ -0,0 +1,90 @@
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from benchmarks.corpora import corpora
+from src.config.settings import PNG_ENCODING, configure_matplotlib
+from src.utils import image
+from src.utils.artifact import encode_png
+from src.utils.cache import RenderCache
+from src.utils.latex import find_latex_equations
+
+COLORS = ("white", "black", "red", "blue", "green")
+
+LARGE_EQUATION = r"\sum_{i=0}^{n} \frac{x_i^2}{y_i} + " * 12 + "z"
+
+def direct_render(eq, color, font_size, dpi, mathtext):
+    # What the renderers produced before masks: the text drawn in its color, then cropped.
+    renderer = image.agg_renderer()
+    try:
+        if mathtext:
+            pixels = renderer.render(eq, color, font_size, dpi, usetex=False, fontset=image.FAST_MODE_CONFIG['fontset'])
+        else:
+            pixels = renderer.render(eq, color, font_size, dpi)
+    except ValueError:
+        return None
+    return image.finish_image(np.array(pixels), dpi)
+
+def verify(equations, font_size, dpi, mathtext):
+    render = image.render_latex_mathtext if mathtext else image.render_latex_matplotlib
+    counts = {'checked': 0, 'pixel': 0, 'png': 0, 'resized': 0, 'resized_alpha': 0}
+    for eq in equations:
+        for color in COLORS:
+            expected = direct_render(eq, color, font_size, dpi, mathtext)
+            actual = render(eq, color, font_size, dpi)
+            if expected is None or actual is None:
+                continue
+            expected_pixels, actual_pixels = np.asarray(expected), np.asarray(actual)
+            if expected.width >= 1800 or expected.height >= 600:
+                # Oversized renders go through a premultiplied LANCZOS resize, which only keeps alpha exact.
+                counts['resized'] += 1
+                counts['resized_alpha'] += int(not np.array_equal(expected_pixels[:, :, 3], actual_pixels[:, :, 3]))
+                continue
+            counts['checked'] += 1
+            counts['pixel'] += int(not np.array_equal(expected_pixels, actual_pixels))
+            tinted = image.RenderedArtifact(mask=actual.getchannel('A'), color=image.text_rgb(color), encoding=PNG_ENCODING)
+            counts['png'] += int(encode_png(expected, **PNG_ENCODING) != tinted.png_bytes())
+    return counts
+
+def color_switch(equations, font_size, dpi, mode, repeat):
+    cold, warm = [], []
+    for i in range(repeat):
+        cache = RenderCache()
+        for color in COLORS:
+            start = time.perf_counter()
+            artifacts = image.render_equations(equations, color, font_size, dpi, mode=mode, cache=cache)
+            for artifact in artifacts:
+                if artifact is not None:
+                    artifact.png_bytes()
+            (cold if color == COLORS[0] else warm).append(time.perf_counter() - start)
+    return cold, warm
+
+def main():
+    parser = argparse.ArgumentParser(description="Check mask tinting against direct colored renders and time color switches.")
+    parser.add_argument("--equations", type=int, default=30)
+    parser.add_argument("--font-size", type=int, default=12)
+    parser.add_argument("--dpi", type=int, default=300)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--mathtext", action="store_true", help="Disable usetex (for machines without a TeX install)")
+    args = parser.parse_args()
+    configure_matplotlib(usetex=not args.mathtext)
+
+    unique = list(dict.fromkeys(eq for text in corpora(quick=True).values() for eq in find_latex_equations(text)['equations']))
+    equations = unique[:args.equations]
+    for label, mathtext in (("Matplotlib", False), ("Fast (mathtext route)", True)):
+        counts = verify(equations + [LARGE_EQUATION], args.font_size, args.dpi, mathtext)
+        print(f"{label}: {counts['checked']} renders over {len(COLORS)} colors, {counts['pixel']} pixel and {counts['png']} PNG mismatches; "
+              f"{counts['resized']} resized renders, {counts['resized_alpha']} alpha mismatches")
+    print(f"{'mode':<14}{'first color ms':>16}{'other colors ms':>17}")
+    for mode in ("Matplotlib", "Fast"):
+        cold, warm = color_switch(equations, args.font_size, args.dpi, mode, args.repeat)
+        print(f"{mode:<14}{statistics.median(cold) * 1000:>16.1f}{statistics.median(warm) * 1000:>17.1f}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,51 @@
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from templates.test_string import TEST_STRING
+
+PROSE = ("We now bound the remaining term using the previous lemma and collect the constants so that "
+         "the estimate holds uniformly in the parameter").split()
+
+INLINE = [
+    r"$x_{%d}$", r"\(\alpha_{%d} + \beta\)", r"$\frac{1}{%d}$", r"$a^{%d} + b^2$", r"$\sqrt{%d}$",
+]
+
+DISPLAY = [
+    r"\[\int_0^{%d} x^2 \, dx = \frac{x^3}{3}\]",
+    r"$$\sum_{i=0}^{n} i^{%d} = \frac{n(n+1)}{2}$$",
+    "\\[\n\\left( \\frac{20}{x^2 - %d} - \\frac{2}{x - 6} \\right) \\times \\frac{1}{4 - x}\n\\]",
+    "\\begin{equation}\nE = mc^{%d}\n\\end{equation}",
+]
+
+def words(rng, low, high):
+    return " ".join(rng.choice(PROSE) for _ in range(rng.randint(low, high)))
+
+def inline_heavy(equations=60, seed=1):
+    rng = random.Random(seed)
+    return " ".join(f"{words(rng, 2, 8)} {rng.choice(INLINE) % rng.randint(1, 9)}" for _ in range(equations))
+
+def display_heavy(equations=30, seed=2):
+    rng = random.Random(seed)
+    return "\n\n".join(f"{words(rng, 10, 30)}\n\n{rng.choice(DISPLAY) % rng.randint(1, 9)}" for _ in range(equations))
+
+def huge(size_bytes=2 * 1024 * 1024, seed=3):
+    rng = random.Random(seed)
+    parts = []
+    total = 0
+    while total < size_bytes:
+        snippet = rng.choice(INLINE + DISPLAY) % rng.randint(1, 9)
+        part = f"{words(rng, 5, 40)} {snippet}\n"
+        parts.append(part)
+        total += len(part)
+    return "".join(parts)
+
+def corpora(quick=False):
+    return {
+        'test_string': TEST_STRING,
+        'inline_heavy': inline_heavy(20 if quick else 60),
+        'display_heavy': display_heavy(10 if quick else 30),
+        'huge': huge(256 * 1024 if quick else 2 * 1024 * 1024),
+    }
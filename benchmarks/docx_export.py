@@ -0,0 +1,79 @@
+import argparse
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import matplotlib
+matplotlib.use('Agg')
+from matplotlib import rcParams
+from src.config.settings import PNG_ENCODING, RC_PARAMS
+from src.utils.artifact import RenderedArtifact
+from src.utils.document import build_docx
+from src.utils.image import render_latex_matplotlib
+from src.utils.latex import find_latex_equations
+
+def legacy_build_docx(images, original_text, equations, font_size):
+    # The previous export: one NamedTemporaryFile round trip per image, serially.
+    from docx import Document
+    from docx.shared import Pt
+    doc = Document()
+    last_pos = 0
+    img_index = 0
+    for match in equations['matches']:
+        text_segment = original_text[last_pos:match['start']].strip()
+        if text_segment:
+            doc.add_paragraph(text_segment).runs[0].font.size = Pt(font_size)
+        if img_index < len(images):
+            with tempfile.NamedTemporaryFile(suffix=".png", delete=False) as tmp:
+                images[img_index].image.save(tmp.name, format='PNG')
+                doc.add_paragraph().add_run().add_picture(tmp.name, width=Pt(300))
+                os.unlink(tmp.name)
+            img_index += 1
+        last_pos = match['end']
+    return doc
+
+def export_corpus(count, dpi):
+    text = "\n".join(f"Step {i}: \\[\\sum_{{k=0}}^{{{i}}} k^2 = \\frac{{{i}}}{{{i % 7 + 2}}}\\]" for i in range(count))
+    equations = find_latex_equations(text)
+    images = [render_latex_matplotlib(eq, "black", 12, dpi) for eq in equations['equations']]
+    return text, equations, images
+
+def main():
+    parser = argparse.ArgumentParser(description="Time DOCX export of many equations: temp files vs in-memory streams.")
+    parser.add_argument("--equations", type=int, default=500)
+    parser.add_argument("--dpi", type=int, default=300)
+    parser.add_argument("--mathtext", action="store_true", help="Disable usetex (for machines without a TeX install)")
+    args = parser.parse_args()
+
+    rcParams.update(RC_PARAMS)
+    if args.mathtext:
+        rcParams['text.usetex'] = False
+    text, equations, images = export_corpus(args.equations, args.dpi)
+    print(f"{len(images)} equations rendered")
+
+    def fresh():
+        return [RenderedArtifact(img, encoding=PNG_ENCODING) for img in images]
+
+    def reused():
+        artifacts = fresh()
+        for artifact in artifacts:
+            artifact.png_bytes()
+        return artifacts
+
+    runs = (
+        ("temp files, serial", lambda artifacts: legacy_build_docx(artifacts, text, equations, 12), fresh),
+        ("in-memory, encode in parallel", lambda artifacts: build_docx(artifacts, text, equations, 12), fresh),
+        ("in-memory, clipboard PNGs reused", lambda artifacts: build_docx(artifacts, text, equations, 12), reused),
+    )
+    for label, export, prepare in runs:
+        artifacts = prepare()
+        start = time.perf_counter()
+        export(artifacts).save(io.BytesIO())
+        print(f"{label:<34} {(time.perf_counter() - start) * 1000:9.1f} ms")
+
+if __name__ == "__main__":
+    main()
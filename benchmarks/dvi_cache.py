@@ -0,0 +1,64 @@
+import argparse
+import os
+import shutil
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.config.settings import configure_matplotlib
+from src.utils import image
+from src.utils.cache import RenderCache
+
+LARGE_EQUATION = r"\sum_{i=0}^{n} \frac{x_i^2}{y_i} + " * 12 + "z"
+
+def equations(count):
+    return [f"x_{{{i}}}^{{2}} + \\frac{{{i}}}{{{i + 1}}} = \\alpha_{{{i}}}" for i in range(count)]
+
+def measure(render, latex_strings, dpi):
+    samples = []
+    for eq in latex_strings:
+        start = time.perf_counter()
+        if render(eq, "black", 12, dpi) is None:
+            raise RuntimeError(f"Render failed: {eq}")
+        samples.append(time.perf_counter() - start)
+    return samples
+
+def timed(render, *args):
+    start = time.perf_counter()
+    result = render(*args)
+    return result, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-rendering at a new dpi from cached DVI, and fitting oversized equations without resampling.")
+    parser.add_argument("--equations", type=int, default=20)
+    parser.add_argument("--dpi", type=int, default=300)
+    parser.add_argument("--new-dpi", type=int, default=150)
+    parser.add_argument("--mathtext", action="store_true", help="Disable usetex (for machines without a TeX install)")
+    args = parser.parse_args()
+    configure_matplotlib(usetex=not args.mathtext)
+
+    for dpi in (args.dpi, args.new_dpi, args.dpi * 2):
+        result, elapsed = timed(image.render_latex_matplotlib, LARGE_EQUATION, "black", 12, dpi)
+        print(f"Matplotlib oversized equation at {dpi} dpi: {result.width}x{result.height} in {elapsed * 1000:.0f} ms")
+    if not (shutil.which("latex") and shutil.which("dvipng")):
+        print("latex and dvipng not found; Standalone re-rasterization skipped")
+        return 0
+
+    image.tex_intermediates = RenderCache(name='dvi_cache')
+    latex_strings = equations(args.equations)
+    print(f"{'Standalone path':<30}{f'{args.dpi} dpi ms':>14}{f'{args.new_dpi} dpi ms':>14}")
+    first = measure(image.render_latex_standalone, latex_strings, args.dpi)
+    second = measure(image.render_latex_standalone, latex_strings, args.new_dpi)
+    print(f"{'latex per equation (p50)':<30}{statistics.median(first) * 1000:>14.1f}{statistics.median(second) * 1000:>14.1f}")
+    _, first = timed(image.render_latex_standalone_batch, latex_strings, "blue", 12, args.dpi)
+    _, second = timed(image.render_latex_standalone_batch, latex_strings, "blue", 12, args.new_dpi)
+    print(f"{'batch (per equation)':<30}{first / len(latex_strings) * 1000:>14.1f}{second / len(latex_strings) * 1000:>14.1f}")
+    result, elapsed = timed(image.render_latex_standalone, LARGE_EQUATION, "black", 12, args.dpi)
+    print(f"Standalone oversized equation: {result.width}x{result.height} in {elapsed * 1000:.0f} ms")
+    print(f"DVI cache: {image.tex_intermediates.stats()}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
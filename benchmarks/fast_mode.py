@@ -0,0 +1,54 @@
+import argparse
+import os
+import shutil
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.corpora import corpora
+from src.config.settings import configure_matplotlib
+from src.utils import image
+from src.utils.latex import find_latex_equations, mathtext_blocker
+
+def measure(render, latex_strings, dpi):
+    samples = []
+    failures = 0
+    for eq in latex_strings:
+        start = time.perf_counter()
+        if render(eq, "black", 12, dpi) is None:
+            failures += 1
+        samples.append(time.perf_counter() - start)
+    return samples, failures
+
+def main():
+    parser = argparse.ArgumentParser(description="Fast mode routing over the benchmark corpora and per-route render latency.")
+    parser.add_argument("--equations", type=int, default=40, help="Unique equations timed per route")
+    parser.add_argument("--dpi", type=int, default=300)
+    args = parser.parse_args()
+    has_tex = bool(shutil.which("latex") and shutil.which("dvipng"))
+    configure_matplotlib(usetex=has_tex)
+
+    unique = list(dict.fromkeys(eq for text in corpora(quick=True).values() for eq in find_latex_equations(text)['equations']))
+    blocked = {}
+    for eq in unique:
+        blocker = mathtext_blocker(eq)
+        if blocker is not None:
+            blocked[eq] = blocker
+    mathtext = [eq for eq in unique if eq not in blocked][:args.equations]
+    samples, failures = measure(image.render_latex_mathtext, mathtext, args.dpi)
+    print(f"{len(unique)} unique equations: {len(unique) - len(blocked)} classified for mathtext, {len(blocked)} for TeX "
+          f"({', '.join(sorted(set(blocked.values()))) or 'none'}); {failures} of {len(mathtext)} timed fell back after a mathtext failure")
+    print(f"{'route':<26}{'p50 ms':>10}{'mean ms':>10}")
+    print(f"{'mathtext':<26}{statistics.median(samples) * 1000:>10.1f}{statistics.mean(samples) * 1000:>10.1f}")
+    if not has_tex:
+        print("latex and dvipng not found; TeX routes skipped")
+        return 0
+    for label, render in (("usetex (Matplotlib)", image.render_latex_matplotlib), ("Standalone", image.render_latex_standalone)):
+        samples, _ = measure(render, mathtext, args.dpi)
+        print(f"{label:<26}{statistics.median(samples) * 1000:>10.1f}{statistics.mean(samples) * 1000:>10.1f}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
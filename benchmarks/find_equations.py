@@ -0,0 +1,88 @@
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils.latex import find_latex_equations
+
+PARAGRAPH_WORDS = "the energy of the system is bounded by a constant and we obtain the estimate below".split()
+
+SNIPPETS = [
+    lambda r: f"${r.choice('abcxyz')}_{r.randint(0, 9)}$",
+    lambda r: r"\(\alpha + \beta_{%d}\)" % r.randint(0, 99),
+    lambda r: "$$\\int_0^{%d} x^2 \\, dx = \\frac{%d}{3}$$" % (r.randint(1, 9), r.randint(1, 9)),
+    lambda r: "\\[\n\\sum_{i=0}^{n} i^{%d}\n\\]" % r.randint(1, 5),
+    lambda r: "\\begin{equation}\nE = mc^{%d}\n\\end{equation}" % r.randint(2, 4),
+    lambda r: "\\begin{align*}\na &= b + %d \\\\\nc &= d\n\\end{align*}" % r.randint(0, 9),
+    lambda r: "costs \\$%d per unit" % r.randint(1, 99),
+]
+
+def legacy_find_latex_equations(text):
+    if not text:
+        return {'equations': [], 'matches': []}
+    patterns = [
+        (r'\\\[(.*?)\\\]', True),
+        (r'\\\((.*?)\\\)', False),
+        (r'\$\$(.*?)\$\$', True),
+        (r'\$(.*?)\$', False),
+        (r'\\begin\{equation\}(.*?)\\end\{equation\}', True)
+    ]
+    matches = []
+    for pattern, is_display in patterns:
+        for match in re.finditer(pattern, text, re.DOTALL):
+            equation = match.group(1).strip()
+            if equation:
+                cleaned = equation.replace('\n', ' ').strip()
+                matches.append({'start': match.start(), 'end': match.end(), 'equation': cleaned, 'is_display': is_display})
+    matches.sort(key=lambda x: x['start'])
+    return {'equations': [m['equation'] for m in matches], 'matches': matches}
+
+def make_paper(size_bytes, seed=0):
+    rng = random.Random(seed)
+    parts = []
+    total = 0
+    while total < size_bytes:
+        words = " ".join(rng.choice(PARAGRAPH_WORDS) for _ in range(rng.randint(5, 40)))
+        part = f"{words} {rng.choice(SNIPPETS)(rng)}\n"
+        parts.append(part)
+        total += len(part)
+    return "".join(parts)
+
+def check_spans(result):
+    last_end = -1
+    for match in result['matches']:
+        if match['start'] < last_end:
+            return False
+        last_end = match['end']
+    return True
+
+def best_time(function, text, repeat):
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function(text)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def main():
+    parser = argparse.ArgumentParser(description="Time find_latex_equations on multi-megabyte pastes.")
+    parser.add_argument("--sizes", default="1,4,16", help="Comma-separated corpus sizes in MB")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    for size_mb in (float(s) for s in args.sizes.split(",")):
+        text = make_paper(int(size_mb * 1024 * 1024))
+        scanner_time, scanner = best_time(find_latex_equations, text, args.repeat)
+        legacy_time, legacy = best_time(legacy_find_latex_equations, text, args.repeat)
+        print(f"{size_mb:6.1f} MB  scanner {scanner_time * 1000:9.1f} ms ({len(scanner['equations'])} equations, "
+              f"{'non-overlapping' if check_spans(scanner) else 'OVERLAPPING'})  "
+              f"regex x5 {legacy_time * 1000:9.1f} ms ({len(legacy['equations'])} equations)  "
+              f"throughput {size_mb / scanner_time:6.1f} MB/s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import matplotlib
+matplotlib.use('Agg')
+from matplotlib import rcParams
+from src.config.settings import RC_PARAMS
+from src.utils import image
+from src.utils.latex import find_latex_equations
+
+def answer(equations, typo_at=None):
+    lines = []
+    for i in range(equations):
+        exponent = f"{i}" if i != typo_at else f"{i}+1"
+        lines.append(f"Step {i}: we get \\[\\sum_{{k=0}}^{{n}} k^{{{exponent}}} = \\frac{{n}}{{{i + 2}}}\\]")
+    return "\n".join(lines)
+
+class CountingRenderer:
+    def __init__(self, render):
+        self.render = render
+        self.calls = 0
+
+    def __call__(self, latex_strings, *args, **kwargs):
+        self.calls += len(latex_strings)
+        return self.render(latex_strings, *args, **kwargs)
+
+def copy(text, previous, color, font_size, dpi):
+    equations = find_latex_equations(text)['equations']
+    keys = image.render_keys(equations, color, font_size, dpi)
+    start = time.perf_counter()
+    images = image.render_equations(equations, color, font_size, dpi, previous=previous, keys=keys)
+    elapsed = time.perf_counter() - start
+    return {key: img for key, img in zip(keys, images) if img}, elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-copy an answer after fixing one equation, with and without incremental reuse.")
+    parser.add_argument("--equations", type=int, default=40)
+    parser.add_argument("--dpi", type=int, default=300)
+    parser.add_argument("--mathtext", action="store_true", help="Disable usetex (for machines without a TeX install)")
+    args = parser.parse_args()
+
+    rcParams.update(RC_PARAMS)
+    if args.mathtext:
+        rcParams['text.usetex'] = False
+    counter = CountingRenderer(image.render_matplotlib_many)
+    image.render_matplotlib_many = counter
+
+    first, first_time = copy(answer(args.equations), None, "black", 12, args.dpi)
+    print(f"first copy:        {counter.calls:3d} renders, {first_time * 1000:8.1f} ms")
+    for label, previous in (("full re-render:", None), ("incremental:", first)):
+        counter.calls = 0
+        _, elapsed = copy(answer(args.equations, typo_at=args.equations // 2), previous, "black", 12, args.dpi)
+        print(f"{label:<18} {counter.calls:3d} renders, {elapsed * 1000:8.1f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+import argparse
+import logging
+import os
+import queue
+import statistics
+import sys
+import tempfile
+import time
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.config.settings import LOGGING_CONFIG, configure_matplotlib
+from src.utils.cache import RenderCache
+from src.utils.clipboard import MemoryClipboardBackend, set_clipboard_payload
+from src.utils.document import build_cf_html
+from src.utils.image import render_equations
+from src.utils.latex import find_latex_equations
+
+DEFAULTS = {"mode": "Matplotlib", "text_color": "white", "font_size": "12", "dpi": "300", "only_images": False, "logger_enabled": True}
+
+def paste(equations):
+    return "\n".join(f"Step {i}: we get \\[\\sum_{{k=0}}^{{n}} k^{{{i}}} = \\frac{{n}}{{{i + 2}}}\\] and $x_{{{i}}}$." for i in range(equations // 2))
+
+def handlers(log_path, stream):
+    formatter = logging.Formatter(LOGGING_CONFIG['format'])
+    result = [RotatingFileHandler(log_path, maxBytes=LOGGING_CONFIG['max_bytes'], backupCount=1, encoding='utf-8'), logging.StreamHandler(stream)]
+    for handler in result:
+        handler.setFormatter(formatter)
+    return result
+
+def install(setup, log_path, stream):
+    logger = logging.getLogger()
+    logger.handlers.clear()
+    logger.setLevel(logging.INFO)
+    logging.disable(logging.NOTSET)
+    if setup == 'disabled':
+        logging.disable(logging.CRITICAL)
+        return None
+    if setup == 'legacy':
+        for handler in handlers(log_path, stream):
+            logger.addHandler(handler)
+        return None
+    log_queue = queue.SimpleQueue()
+    listener = QueueListener(log_queue, *handlers(log_path, stream), respect_handler_level=True)
+    listener.start()
+    logger.addHandler(QueueHandler(log_queue))
+    return listener
+
+def app_records(setup, text, images, stats):
+    # The records one paste produces in the GUI, in the previous eager f-string form and the current lazy form.
+    if setup == 'legacy':
+        logging.info(f"New clipboard content: {text[:100]}...")
+        logging.info(f"Rendering clipboard text: {text[:100]}...")
+        logging.info(f"Render cache: {stats['memory_hits']} memory hits, {stats['disk_hits']} disk hits, {stats['misses']} misses")
+        logging.info(f"Copied {len(images)} images, {sum(img.payload_size for img in images) / 1024:.0f} KB of base64 PNG")
+        logging.info(f"Loaded defaults: {DEFAULTS}")
+    else:
+        logging.info("New clipboard content: %.100s...", text)
+        logging.info("Rendering %s text: %.100s...", "clipboard", text)
+        logging.info("Render cache: %s memory hits, %s disk hits, %s misses", stats['memory_hits'], stats['disk_hits'], stats['misses'])
+        logging.info("Copied %s images, %.0f KB of base64 %s", len(images), sum(img.payload_size for img in images) / 1024, "PNG")
+        logging.info("Loaded defaults: %s", DEFAULTS)
+
+def copy(setup, text, cache, backend):
+    equations = find_latex_equations(text)
+    images = render_equations(equations['equations'], "black", 12, 300, cache=cache)
+    set_clipboard_payload(build_cf_html(images, text, equations, "black", 12), backend=backend)
+    app_records(setup, text, images, cache.stats())
+
+def main():
+    parser = argparse.ArgumentParser(description="Logging cost on the render thread: synchronous handlers vs the queue pipeline.")
+    parser.add_argument("--equations", type=int, default=30)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--records", type=int, default=20000)
+    parser.add_argument("--mathtext", action="store_true", help="Disable usetex (for machines without a TeX install)")
+    args = parser.parse_args()
+
+    configure_matplotlib(usetex=not args.mathtext)
+    text = paste(args.equations)
+    cache = RenderCache()
+    backend = MemoryClipboardBackend()
+    copy('disabled', text, cache, backend)
+    with tempfile.TemporaryDirectory() as temp_dir, open(os.devnull, 'w') as devnull:
+        log_path = os.path.join(temp_dir, "bench.log")
+        results = {}
+        for setup in ('disabled', 'legacy', 'queue'):
+            listener = install(setup, log_path, devnull)
+            samples = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                copy(setup, text, cache, backend)
+                samples.append(time.perf_counter() - start)
+            start = time.perf_counter()
+            for i in range(args.records):
+                logging.info("Rendering %s text: %.100s...", "clipboard", text)
+            per_record = (time.perf_counter() - start) / args.records
+            if listener is not None:
+                listener.stop()
+            results[setup] = (statistics.median(samples) * 1000, per_record * 1e6)
+        logging.disable(logging.NOTSET)
+        logging.getLogger().handlers.clear()
+    baseline = results['disabled'][0]
+    print(f"{'setup':<10}{'paste p50 ms':>14}{'logging ms':>12}{'per record us':>15}")
+    for setup, (paste_ms, record_us) in results.items():
+        print(f"{setup:<10}{paste_ms:>14.2f}{paste_ms - baseline:>12.2f}{record_us:>15.1f}")
+    print(f"(warm-cache paste of {args.equations} equations; handlers write to a temp file and /dev/null)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import matplotlib
+matplotlib.use('Agg')
+import numpy as np
+from matplotlib import rcParams
+from src.config.settings import RC_PARAMS
+from src.utils.image import render_latex_matplotlib, render_latex_matplotlib_pyplot, render_latex_matplotlib_svg
+
+EQUATIONS = [
+    r"x^2",
+    r"\alpha + \beta",
+    r"\frac{1}{3}",
+    r"\int_0^1 x^2 dx = \frac{1}{3}",
+    r"\sum_{i=0}^{n} i^2 = \frac{n(n+1)(2n+1)}{6}",
+    r"\left( \frac{20}{x^2 - 36} - \frac{2}{x - 6} \right) \times \frac{1}{4 - x}",
+]
+
+# (equation, font size, dpi) whose renders exceed the 1800x600 cap and are drawn again at a lower figure dpi.
+CAPPED = [
+    (r"x^2", 30, 600),
+    (r"\alpha + \beta", 12, 600),
+    (r"\frac{1}{3}", 50, 600),
+    (r"\int_0^1 x^2 dx", 40, 500),
+    (r"\sum_{i=0}^{n} \frac{x_i^2}{y_i} + " * 12 + "z", 12, 300),
+]
+
+def time_renderer(render, equations, text_color, font_size, dpi, repeat):
+    render(equations[0], text_color, font_size, dpi)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for eq in equations:
+            render(eq, text_color, font_size, dpi)
+    return (time.perf_counter() - start) / (repeat * len(equations))
+
+def compare_pixels(equations, text_color, font_size, dpi):
+    mismatches = []
+    for eq in equations:
+        reference = render_latex_matplotlib_pyplot(eq, text_color, font_size, dpi)
+        candidate = render_latex_matplotlib(eq, text_color, font_size, dpi)
+        if reference is None or candidate is None:
+            if reference is not candidate:
+                mismatches.append((eq, "empty in only one renderer"))
+        elif reference.size != candidate.size:
+            mismatches.append((eq, f"size {reference.size} != {candidate.size}"))
+        elif not np.array_equal(np.asarray(reference), np.asarray(candidate)):
+            mismatches.append((eq, "pixel values differ"))
+    return mismatches
+
+def check_capped(cases, text_color, fill=0.97):
+    # Redrawn renders differ from pyplot's resampled ones pixel for pixel; they must fit the cap and fill it.
+    problems = []
+    for eq, font_size, dpi in cases:
+        reference = render_latex_matplotlib_pyplot(eq, text_color, font_size, dpi)
+        candidate = render_latex_matplotlib(eq, text_color, font_size, dpi)
+        if candidate is None:
+            problems.append((eq, font_size, dpi, reference and reference.size, None, "empty"))
+            continue
+        width, height = candidate.size
+        if width > 1800 or height > 600:
+            problems.append((eq, font_size, dpi, reference.size, candidate.size, "over the cap"))
+        elif max(width / 1800, height / 600) < fill:
+            problems.append((eq, font_size, dpi, reference.size, candidate.size, "does not fill the cap"))
+        else:
+            print(f"capped {eq[:30]:<30} {font_size:>3}pt {dpi:>4} dpi: pyplot {reference.size}, reused canvas {candidate.size}")
+    return problems
+
+def compare_svg_sizes(cases, text_color, tolerance=0.01):
+    # SVG mode crops to the glyph outlines and PNG mode to antialiased ink, so sizes agree to about a pixel.
+    problems = []
+    for eq, font_size, dpi in cases:
+        png = render_latex_matplotlib(eq, text_color, font_size, dpi)
+        svg = render_latex_matplotlib_svg(eq, text_color, font_size, dpi)
+        if png is None or svg is None:
+            problems.append((eq, font_size, dpi, png and png.size, svg and svg.size))
+        elif any(abs(a - b) > max(4, tolerance * a) for a, b in zip(png.size, svg.size)):
+            problems.append((eq, font_size, dpi, png.size, svg.size))
+    return problems
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the reusable Agg renderer against the pyplot savefig path.")
+    parser.add_argument("--dpi", type=int, default=300)
+    parser.add_argument("--font-size", type=int, default=12)
+    parser.add_argument("--color", default="black")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--mathtext", action="store_true", help="Disable usetex (for machines without a TeX install)")
+    args = parser.parse_args()
+
+    rcParams.update(RC_PARAMS)
+    if args.mathtext:
+        rcParams['text.usetex'] = False
+
+    mismatches = compare_pixels(EQUATIONS, args.color, args.font_size, args.dpi)
+    for eq, reason in mismatches:
+        print(f"MISMATCH {eq}: {reason}")
+    print(f"Pixel check: {len(EQUATIONS) - len(mismatches)}/{len(EQUATIONS)} identical")
+    problems = check_capped(CAPPED, args.color)
+    for eq, font_size, dpi, reference, candidate, reason in problems:
+        print(f"CAPPED {eq[:30]} {font_size}pt {dpi} dpi: {reason} (pyplot {reference}, reused canvas {candidate})")
+    print(f"Capped check: {len(CAPPED) - len(problems)}/{len(CAPPED)} fit and fill the 1800x600 cap")
+    svg_cases = [(eq, args.font_size, args.dpi) for eq in EQUATIONS] + CAPPED
+    svg_problems = compare_svg_sizes(svg_cases, args.color)
+    for eq, font_size, dpi, png, svg in svg_problems:
+        print(f"SVG SIZE {eq[:30]} {font_size}pt {dpi} dpi: PNG {png}, SVG {svg}")
+    print(f"SVG size check: {len(svg_cases) - len(svg_problems)}/{len(svg_cases)} match the PNG size")
+
+    legacy = time_renderer(render_latex_matplotlib_pyplot, EQUATIONS, args.color, args.font_size, args.dpi, args.repeat)
+    reused = time_renderer(render_latex_matplotlib, EQUATIONS, args.color, args.font_size, args.dpi, args.repeat)
+    print(f"pyplot savefig:   {legacy * 1000:8.2f} ms/equation")
+    print(f"reused Agg canvas: {reused * 1000:8.2f} ms/equation")
+    print(f"speedup:          {legacy / reused:8.2f}x")
+    return 1 if mismatches or problems or svg_problems else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
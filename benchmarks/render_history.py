@@ -0,0 +1,76 @@
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.corpora import corpora
+from src.config.settings import HISTORY_CONFIG, PNG_ENCODING, configure_matplotlib
+from src.utils import image
+from src.utils.artifact import RenderedArtifact, tint_mask
+from src.utils.document import build_docx
+from src.utils.history import RenderHistory
+from src.utils.latex import find_latex_equations
+
+def megabytes(count):
+    return count / 1024 / 1024
+
+def copied(artifacts):
+    # What a clipboard copy leaves behind on each artifact: PNG bytes and their base64.
+    for artifact in artifacts:
+        artifact.base64_bytes()
+    return artifacts
+
+def main():
+    parser = argparse.ArgumentParser(description="Resident memory of the last rendered payload before and after compaction into the render history.")
+    parser.add_argument("--equations", type=int, default=40)
+    parser.add_argument("--dpi", type=int, default=600)
+    parser.add_argument("--payloads", type=int, default=20, help="Payloads pushed through the history")
+    parser.add_argument("--mathtext", action="store_true", help="Disable usetex (for machines without a TeX install)")
+    args = parser.parse_args()
+    configure_matplotlib(usetex=not args.mathtext)
+
+    unique = list(dict.fromkeys(eq for text in corpora(quick=True).values() for eq in find_latex_equations(text)['equations']))
+    equations = unique[:args.equations]
+    masks = [mask for mask in image.render_matplotlib_many(equations, 12, args.dpi) if mask is not None]
+    color = image.text_rgb("black")
+
+    def tinted():
+        return copied([RenderedArtifact(mask=mask, color=color, encoding=PNG_ENCODING) for mask in masks])
+
+    # Standalone and SVG rasters arrive as decoded RGBA images rather than masks.
+    variants = (("mask + color", tinted),
+                ("RGBA image", lambda: copied([RenderedArtifact(tint_mask(mask, color), encoding=PNG_ENCODING) for mask in masks])))
+    print(f"{len(masks)} equations at {args.dpi} dpi")
+    print(f"{'artifact':<16}{'held MB':>10}{'history MB':>12}{'first decode ms':>17}")
+    for label, build in variants:
+        artifacts = build()
+        held = sum(artifact.resident_bytes() for artifact in artifacts)
+        history = RenderHistory(**HISTORY_CONFIG)
+        history.add("", None, artifacts, {})
+        compacted = history.stats()['resident_bytes']
+        start = time.perf_counter()
+        for artifact in history.latest().images:
+            artifact.image
+        decode = time.perf_counter() - start
+        print(f"{label:<16}{megabytes(held):>10.1f}{megabytes(compacted):>12.1f}{decode * 1000:>17.1f}")
+
+    history = RenderHistory(**HISTORY_CONFIG)
+    for i in range(args.payloads):
+        history.add(f"payload {i}", None, tinted(), {})
+    stats = history.stats()
+    print(f"after {args.payloads} payloads: {stats['entries']} kept, {stats['evicted']} evicted, "
+          f"{megabytes(stats['resident_bytes']):.1f} of {megabytes(stats['memory_bytes']):.0f} MB resident")
+
+    entry = history.latest()
+    text = " ".join(f"${eq}$" for eq in equations)
+    start = time.perf_counter()
+    build_docx(entry.images, text, find_latex_equations(text), 12, only_images=True)
+    history.compact()
+    print(f"DOCX from the latest payload: {(time.perf_counter() - start) * 1000:.0f} ms, "
+          f"{megabytes(history.stats()['resident_bytes']):.1f} MB resident afterwards")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
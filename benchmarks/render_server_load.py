@@ -0,0 +1,116 @@
+import argparse
+import itertools
+import os
+import random
+import statistics
+import subprocess
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from src.config.settings import RENDER_SERVER_CONFIG
+from src.utils.server import RenderClient
+
+class EquationSource:
+    def __init__(self, unique):
+        self.unique = unique
+        self.salt = random.randrange(10 ** 6)
+        self.counter = itertools.count()
+        self.lock = threading.Lock()
+
+    def take(self, count):
+        with self.lock:
+            numbers = [next(self.counter) if self.unique else i for i in range(count)]
+        return [f"x_{{{n}}} + \\frac{{{self.salt}}}{{{n + 1}}} = \\sqrt{{y_{{{n}}}}}" for n in numbers]
+
+def start_server(port, workers, mathtext):
+    command = [sys.executable, os.path.join(ROOT, "render_server.py"), "--port", str(port), "--workers", str(workers), "--no-disk-cache"]
+    if mathtext:
+        command.append("--mathtext")
+    process = subprocess.Popen(command, cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    client = RenderClient(port=port, usetex=not mathtext)
+    deadline = time.perf_counter() + 120
+    while time.perf_counter() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("render server exited during start-up")
+        try:
+            if client.health():
+                return process
+        except Exception:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("render server did not become healthy")
+
+def run_level(args, concurrency, source):
+    latencies = []
+    failures = []
+    lock = threading.Lock()
+
+    def client_loop():
+        client = RenderClient(port=args.port, usetex=not args.mathtext, timeout=300)
+        client.probe()
+        for _ in range(args.requests):
+            equations = source.take(args.batch)
+            start = time.perf_counter()
+            artifacts = client.render(equations, "black", 12, args.dpi)
+            elapsed = time.perf_counter() - start
+            with lock:
+                if artifacts is None or any(artifact is None for artifact in artifacts):
+                    failures.append(elapsed)
+                else:
+                    latencies.append(elapsed)
+        client.close()
+
+    threads = [threading.Thread(target=client_loop) for _ in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - start
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'failures': len(failures),
+        'eq_per_s': len(latencies) * args.batch / wall,
+        'p50_ms': statistics.median(latencies) * 1000 if latencies else 0.0,
+        'p95_ms': latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000 if latencies else 0.0,
+        'max_ms': latencies[-1] * 1000 if latencies else 0.0,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput and latency of render_server.py at several client concurrency levels.")
+    parser.add_argument("--port", type=int, default=RENDER_SERVER_CONFIG['port'])
+    parser.add_argument("--spawn", action="store_true", help="Start a server for the run instead of using a running one")
+    parser.add_argument("--workers", type=int, default=RENDER_SERVER_CONFIG['workers'])
+    parser.add_argument("--concurrency", default="1,2,4,8,16")
+    parser.add_argument("--requests", type=int, default=10, help="Requests per client")
+    parser.add_argument("--batch", type=int, default=1, help="Equations per request")
+    parser.add_argument("--dpi", type=int, default=300)
+    parser.add_argument("--cached", action="store_true", help="Repeat the same equations so the server cache answers")
+    parser.add_argument("--mathtext", action="store_true", help="Disable usetex (for machines without a TeX install)")
+    args = parser.parse_args()
+
+    process = start_server(args.port, args.workers, args.mathtext) if args.spawn else None
+    try:
+        health = RenderClient(port=args.port).health()
+        print(f"server pid {health['pid']}, {health['workers']} workers, usetex {health['usetex']}; "
+              f"{args.batch} equation(s) per request, {'cached' if args.cached else 'unique'} equations")
+        print(f"{'clients':>8}{'requests':>10}{'failed':>8}{'eq/s':>9}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}")
+        source = EquationSource(unique=not args.cached)
+        for concurrency in (int(level) for level in args.concurrency.split(',')):
+            row = run_level(args, concurrency, source)
+            print(f"{concurrency:>8}{row['requests']:>10}{row['failures']:>8}{row['eq_per_s']:>9.1f}"
+                  f"{row['p50_ms']:>10.1f}{row['p95_ms']:>10.1f}{row['max_ms']:>10.1f}")
+        batcher = RenderClient(port=args.port).health()['batcher']
+        print(f"server batches: {batcher['batches']}, mean {batcher['mean_batch_equations']:.1f} equations per batch")
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+import argparse
+import io
+import json
+import os
+import platform
+import shutil
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import matplotlib
+matplotlib.use('Agg')
+import numpy as np
+from matplotlib import rcParams
+from benchmarks.corpora import corpora
+from src.config.settings import PNG_ENCODING, RC_PARAMS
+from src.utils.artifact import RenderedArtifact, SvgArtifact, encode_png
+from src.utils.clipboard import MemoryClipboardBackend, set_clipboard_payload
+from src.utils.document import build_cf_html, build_docx
+from src.utils.image import AggEquationRenderer, post_process, render_latex_matplotlib, render_latex_standalone, render_latex_svg
+from src.utils.latex import find_latex_equations
+
+TEXT_COLOR = "#000000"
+FONT_SIZE = 12
+DPI = 300
+
+def percentile(samples, q):
+    ordered = sorted(samples)
+    index = (len(ordered) - 1) * q / 100
+    low = int(index)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (index - low)
+
+def summarize(samples):
+    return {
+        'count': len(samples),
+        'mean_ms': sum(samples) / len(samples) * 1000,
+        'p50_ms': percentile(samples, 50) * 1000,
+        'p90_ms': percentile(samples, 90) * 1000,
+        'p99_ms': percentile(samples, 99) * 1000,
+    }
+
+def peak_memory(run):
+    tracemalloc.start()
+    try:
+        run()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def measure(run, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+def measure_each(run, items, repeat):
+    samples = []
+    for _ in range(repeat):
+        for item in items:
+            start = time.perf_counter()
+            run(item)
+            samples.append(time.perf_counter() - start)
+    return samples
+
+class Corpus:
+    def __init__(self, name, text, max_equations):
+        self.name = name
+        self.text = text
+        self.equations = find_latex_equations(text)
+        self.unique = list(dict.fromkeys(self.equations['equations']))[:max_equations]
+        # Pastes reuse a handful of equations; the later stages see the same images the GUI would.
+        self.images = None
+        self.raw = None
+        self.svgs = None
+
+    def render_all(self):
+        images = {eq: render_latex_matplotlib(eq, TEXT_COLOR, FONT_SIZE, DPI) for eq in self.unique}
+        self.images = [images[eq] for eq in self.equations['equations'] if images.get(eq) is not None]
+        renderer = AggEquationRenderer()
+        self.raw = []
+        for eq in self.unique:
+            try:
+                self.raw.append(np.array(renderer.render(eq, TEXT_COLOR, FONT_SIZE, DPI)))
+            except Exception:
+                continue
+
+        svgs = {eq: render_latex_svg(eq, TEXT_COLOR, FONT_SIZE, DPI) for eq in self.unique}
+        self.svgs = [svgs[eq].svg for eq in self.equations['equations'] if svgs.get(eq) is not None]
+
+    def artifacts(self):
+        return [RenderedArtifact(img, encoding=PNG_ENCODING) for img in self.images]
+
+    def svg_artifacts(self):
+        return [SvgArtifact(svg) for svg in self.svgs]
+
+    def payload(self):
+        png = sum(artifact.payload_size for artifact in self.artifacts())
+        svg = sum(artifact.payload_size for artifact in self.svg_artifacts())
+        return {'png_kb': png / 1024, 'svg_kb': svg / 1024, 'png_images': len(self.images), 'svg_images': len(self.svgs)}
+
+def stages(corpus, repeat, docx_available):
+    def detect():
+        find_latex_equations(corpus.text)
+
+    def html():
+        payload = build_cf_html(corpus.artifacts(), corpus.text, corpus.equations, TEXT_COLOR, FONT_SIZE)
+        set_clipboard_payload(payload, backend=MemoryClipboardBackend())
+
+    def html_svg():
+        payload = build_cf_html(corpus.svg_artifacts(), corpus.text, corpus.equations, TEXT_COLOR, FONT_SIZE)
+        set_clipboard_payload(payload, backend=MemoryClipboardBackend())
+
+    def docx():
+        build_docx(corpus.artifacts(), corpus.text, corpus.equations, FONT_SIZE).save(io.BytesIO())
+
+    result = {
+        'detect': (lambda: measure(detect, repeat), detect),
+        'render_matplotlib': (lambda: measure_each(lambda eq: render_latex_matplotlib(eq, TEXT_COLOR, FONT_SIZE, DPI), corpus.unique, repeat),
+                              lambda: [render_latex_matplotlib(eq, TEXT_COLOR, FONT_SIZE, DPI) for eq in corpus.unique]),
+        'postprocess': (lambda: measure_each(lambda pixels: post_process(pixels, DPI), corpus.raw, repeat),
+                        lambda: [post_process(pixels, DPI) for pixels in corpus.raw]),
+        'png_encode': (lambda: measure_each(lambda img: encode_png(img, **PNG_ENCODING), corpus.images, repeat),
+                       lambda: [encode_png(img, **PNG_ENCODING) for img in corpus.images]),
+        'html': (lambda: measure(html, repeat), html),
+        'render_svg': (lambda: measure_each(lambda eq: render_latex_svg(eq, TEXT_COLOR, FONT_SIZE, DPI), corpus.unique, repeat),
+                       lambda: [render_latex_svg(eq, TEXT_COLOR, FONT_SIZE, DPI) for eq in corpus.unique]),
+        'html_svg': (lambda: measure(html_svg, repeat), html_svg),
+    }
+    if docx_available:
+        result['docx'] = (lambda: measure(docx, repeat), docx)
+    if shutil.which('latex') and shutil.which('dvipng'):
+        # One process spawn per equation; a single pass is already representative.
+        result['render_standalone'] = (lambda: measure_each(lambda eq: render_latex_standalone(eq, TEXT_COLOR, FONT_SIZE, DPI), corpus.unique, 1),
+                                       lambda: [render_latex_standalone(eq, TEXT_COLOR, FONT_SIZE, DPI) for eq in corpus.unique[:3]])
+    return result
+
+def run(args):
+    try:
+        import docx  # noqa: F401
+        docx_available = True
+    except ImportError:
+        docx_available = False
+        print("python-docx not installed, skipping the docx stage")
+    results = {}
+    for name, text in corpora(quick=args.quick).items():
+        if args.corpus and name not in args.corpus:
+            continue
+        corpus = Corpus(name, text, args.max_equations)
+        corpus.render_all()
+        print(f"{name}: {len(text)} chars, {len(corpus.equations['equations'])} equations, {len(corpus.unique)} rendered")
+        results[name] = {}
+        for stage, (timed, once) in stages(corpus, args.repeat, docx_available).items():
+            if not corpus.unique and stage != 'detect':
+                continue
+            samples = timed()
+            if not samples:
+                continue
+            stats = summarize(samples)
+            stats['peak_kb'] = peak_memory(once) / 1024
+            results[name][stage] = stats
+            print(f"  {stage:<18} p50 {stats['p50_ms']:9.2f} ms  p90 {stats['p90_ms']:9.2f} ms  "
+                  f"p99 {stats['p99_ms']:9.2f} ms  peak {stats['peak_kb']:9.0f} KB")
+        if corpus.unique:
+            payload = results[name]['payload'] = corpus.payload()
+            print(f"  {'payload':<18} PNG {payload['png_kb']:9.0f} KB ({payload['png_images']} images)  "
+                  f"SVG {payload['svg_kb']:9.0f} KB ({payload['svg_images']} images)")
+        if name == 'test_string' and docx_available and args.export_equations and corpus.images:
+            results['export'] = {'docx': export_stage(corpus.images, args.export_equations, min(args.repeat, 3))}
+    return results
+
+def export_stage(images, count, repeat):
+    # A long answer: the rendered test images cycled across `count` equations, PNGs not yet encoded.
+    text = "\n".join(f"Step {i}: we get $x_{{{i}}}$ here." for i in range(count))
+    equations = find_latex_equations(text)
+    chosen = [images[i % len(images)] for i in range(count)]
+
+    def export():
+        build_docx([RenderedArtifact(img, encoding=PNG_ENCODING) for img in chosen], text, equations, FONT_SIZE).save(io.BytesIO())
+
+    stats = summarize(measure(export, repeat))
+    stats['peak_kb'] = peak_memory(export) / 1024
+    print(f"export: {count} equations")
+    print(f"  {'docx':<18} p50 {stats['p50_ms']:9.2f} ms  p90 {stats['p90_ms']:9.2f} ms  "
+          f"p99 {stats['p99_ms']:9.2f} ms  peak {stats['peak_kb']:9.0f} KB")
+    return stats
+
+def metadata(args):
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'matplotlib': matplotlib.__version__,
+        'usetex': rcParams['text.usetex'],
+        'repeat': args.repeat,
+        'quick': args.quick,
+        'max_equations': args.max_equations,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+
+def regressions(results, baseline, threshold):
+    found = []
+    for corpus, stages in results.items():
+        for stage, stats in stages.items():
+            reference = baseline.get(corpus, {}).get(stage)
+            if not reference or 'p50_ms' not in reference:
+                continue
+            for metric in ('p50_ms', 'p90_ms'):
+                if reference[metric] > 0 and stats[metric] > reference[metric] * (1 + threshold):
+                    found.append(f"{corpus}/{stage} {metric}: {reference[metric]:.2f} -> {stats[metric]:.2f} ms")
+    return found
+
+def main():
+    parser = argparse.ArgumentParser(description="Time each stage of the paste pipeline headlessly.")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--quick", action="store_true", help="Use smaller synthetic corpora")
+    parser.add_argument("--corpus", action="append", help="Only run the named corpus (repeatable)")
+    parser.add_argument("--max-equations", type=int, default=40, help="Cap on unique equations rendered per corpus")
+    parser.add_argument("--mathtext", action="store_true", help="Render with mathtext instead of usetex")
+    parser.add_argument("--export-equations", type=int, default=500, help="Equations in the DOCX export stage (0 to skip)")
+    parser.add_argument("--save-baseline", help="Write results to this JSON file")
+    parser.add_argument("--baseline", help="Compare against a JSON file written by --save-baseline")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed slowdown before flagging a regression")
+    args = parser.parse_args()
+
+    rcParams.update(RC_PARAMS)
+    if args.mathtext:
+        rcParams['text.usetex'] = False
+    results = run(args)
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w', encoding='utf-8') as f:
+            json.dump({'metadata': metadata(args), 'results': results}, f, indent=2)
+        print(f"Baseline written to {args.save_baseline}")
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        found = regressions(results, baseline['results'], args.threshold)
+        for line in found:
+            print(f"REGRESSION {line}")
+        if found:
+            sys.exit(1)
+        print(f"No regressions beyond {args.threshold:.0%} against {args.baseline}")
+
+if __name__ == "__main__":
+    main()
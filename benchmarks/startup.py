@@ -0,0 +1,94 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Each snippet runs in a fresh interpreter and prints the seconds it took.
+SNIPPETS = {
+    'gui_import': """
+import time
+start = time.perf_counter()
+import src.gui.app_gui
+print(time.perf_counter() - start)
+""",
+    'render_modules': """
+import time
+import src.gui.app_gui
+start = time.perf_counter()
+src.gui.app_gui.load_render_modules()
+print(time.perf_counter() - start)
+""",
+    'eager_imports': """
+import time
+start = time.perf_counter()
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot
+import src.gui.app_gui
+src.gui.app_gui.load_render_modules()
+print(time.perf_counter() - start)
+""",
+    'probe': """
+import sys
+import time
+from src.utils.toolchain import ToolchainProbe
+probe = ToolchainProbe(sys.argv[1])
+start = time.perf_counter()
+probe.run()
+print(time.perf_counter() - start, probe.ok, probe.cached)
+""",
+}
+
+def run_snippet(name, *args):
+    result = subprocess.run([sys.executable, "-c", SNIPPETS[name], *args], cwd=ROOT, capture_output=True, text=True, check=True)
+    return result.stdout.split()
+
+def measure(name, repeat, *args):
+    return [float(run_snippet(name, *args)[0]) for _ in range(repeat)]
+
+def measure_probe(repeat):
+    with tempfile.TemporaryDirectory() as temp_dir:
+        cache_file = os.path.join(temp_dir, "toolchain.json")
+        cold = []
+        for _ in range(repeat):
+            if os.path.exists(cache_file):
+                os.unlink(cache_file)
+            seconds, ok, _ = run_snippet('probe', cache_file)
+            cold.append(float(seconds))
+        warm = []
+        if ok == 'True':
+            for _ in range(repeat):
+                seconds, _, cached = run_snippet('probe', cache_file)
+                warm.append(float(seconds))
+        return cold, warm, ok == 'True'
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure cold-start costs in fresh interpreters.")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", help="Write the medians (ms) to this file")
+    args = parser.parse_args()
+
+    results = {}
+    for name, label in (('gui_import', "import app_gui (before window)"),
+                        ('render_modules', "lazy render modules (background)"),
+                        ('eager_imports', "eager imports (previous start)")):
+        samples = measure(name, args.repeat)
+        results[name] = statistics.median(samples) * 1000
+        print(f"{label:<36} median {results[name]:8.1f} ms")
+    cold, warm, ok = measure_probe(args.repeat)
+    results['probe_cold'] = statistics.median(cold) * 1000
+    print(f"{'toolchain probe, uncached':<36} median {results['probe_cold']:8.1f} ms{'' if ok else '  (toolchain not found)'}")
+    if warm:
+        results['probe_cached'] = statistics.median(warm) * 1000
+        print(f"{'toolchain probe, cached':<36} median {results['probe_cached']:8.1f} ms")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.config.settings import configure_matplotlib
+from src.utils.clipboard import MemoryClipboardBackend, set_clipboard_payload
+from src.utils.document import build_cf_html
+from src.utils.image import render_equations
+from src.utils.latex import find_latex_equations
+from src.utils.tracing import configure_tracing, format_summary, traced, tracer
+
+def paste(equations):
+    return "\n".join(f"Step {i}: we get \\[\\sum_{{k=0}}^{{n}} k^{{{i}}} = \\frac{{n}}{{{i + 2}}}\\] and $x_{{{i}}}$." for i in range(equations // 2))
+
+def copy(text, backend):
+    equations = find_latex_equations(text)
+    images = render_equations(equations['equations'], "black", 12, 300)
+    set_clipboard_payload(build_cf_html(images, text, equations, "black", 12), backend=backend)
+
+def noop():
+    pass
+
+def per_call_overhead(calls):
+    wrapped = traced('noop')(noop)
+    results = {}
+    for label, func in (("plain", noop), ("traced", wrapped)):
+        start = time.perf_counter()
+        for _ in range(calls):
+            func()
+        results[label] = (time.perf_counter() - start) / calls * 1e9
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-stage timings for one paste, and what tracing costs when on and off.")
+    parser.add_argument("--equations", type=int, default=30)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--mathtext", action="store_true", help="Disable usetex (for machines without a TeX install)")
+    args = parser.parse_args()
+
+    configure_matplotlib(usetex=not args.mathtext)
+    text = paste(args.equations)
+    backend = MemoryClipboardBackend()
+    with tempfile.TemporaryDirectory() as temp_dir:
+        configure_tracing(False, path=os.path.join(temp_dir, "trace.jsonl"))
+        copy(text, backend)
+        timings = {}
+        for enabled in (False, True):
+            tracer.set_enabled(enabled)
+            samples = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                copy(text, backend)
+                samples.append(time.perf_counter() - start)
+            timings[enabled] = statistics.median(samples) * 1000
+        tracer.set_enabled(False)
+        lines = sum(1 for _ in open(tracer.path, encoding='utf-8'))
+        tracer.close()
+        print(format_summary(tracer.summary()))
+        print()
+        print(f"paste of {args.equations} equations: tracing off {timings[False]:.1f} ms, on {timings[True]:.1f} ms "
+              f"({timings[True] - timings[False]:+.1f} ms, {lines} trace lines)")
+    overhead = per_call_overhead(200000)
+    print(f"per call, tracing off: plain {overhead['plain']:.0f} ns, traced {overhead['traced']:.0f} ns")
+
+if __name__ == "__main__":
+    main()
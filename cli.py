@@ -0,0 +1,83 @@
+import argparse
+import logging
+import os
+import sys
+import time
+from src.config.settings import RENDER_MODES
+from src.utils.batch import DEFAULT_PATTERNS, STDIN_NAME, ConversionSettings, convert_many, convert_text, expand_inputs, init_worker
+
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_USAGE = 2
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Convert Markdown+LaTeX files to HTML/DOCX without the GUI.")
+    parser.add_argument("inputs", nargs="+", help="Files, directories or glob patterns; '-' reads stdin")
+    parser.add_argument("-o", "--output-dir", help="Write outputs here instead of next to each input")
+    parser.add_argument("-f", "--format", action="append", choices=["html", "docx"], help="Output format (repeatable, default html)")
+    parser.add_argument("-j", "--jobs", type=int, default=max(1, (os.cpu_count() or 2) - 1), help="Documents converted in parallel")
+    parser.add_argument("--pattern", action="append", help=f"File pattern inside directories (default {' '.join(DEFAULT_PATTERNS)})")
+    parser.add_argument("--mode", default="Matplotlib", choices=RENDER_MODES)
+    parser.add_argument("--color", default="black")
+    parser.add_argument("--font-size", type=int, default=12)
+    parser.add_argument("--dpi", type=int, default=300)
+    parser.add_argument("--only-images", action="store_true")
+    parser.add_argument("--mathtext", action="store_true", help="Disable usetex (for machines without a TeX install)")
+    parser.add_argument("--no-server", action="store_true", help="Render in-process even if render_server.py is running")
+    parser.add_argument("-q", "--quiet", action="store_true", help="Only print failures and the final summary")
+    parser.add_argument("-v", "--verbose", action="store_true")
+    return parser.parse_args(argv)
+
+def report(result, quiet):
+    timings = " ".join(f"{stage} {seconds * 1000:.0f}ms" for stage, seconds in result.timings.items())
+    if not result.ok:
+        print(f"FAIL {result.source}: {result.error}", file=sys.stderr)
+    elif not quiet:
+        print(f"ok   {result.source}: {result.rendered}/{result.equations} equations, {result.total * 1000:.0f} ms ({timings}) "
+              f"-> {', '.join(result.outputs) or 'stdout'}", file=sys.stderr)
+
+def main(argv=None):
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING, format="%(levelname)s %(message)s")
+    settings = ConversionSettings(args.mode, args.color, args.font_size, args.dpi, args.only_images,
+                                  args.format or ["html"], usetex=not args.mathtext, use_server=not args.no_server)
+    try:
+        settings.validate()
+    except ValueError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return EXIT_USAGE
+    paths, missing = expand_inputs(args.inputs, tuple(args.pattern) if args.pattern else DEFAULT_PATTERNS)
+    for item in missing:
+        print(f"error: no input matches {item}", file=sys.stderr)
+    if not paths:
+        return EXIT_USAGE
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+
+    start = time.perf_counter()
+    results = []
+    if STDIN_NAME in paths:
+        paths.remove(STDIN_NAME)
+        init_worker(settings.usetex, settings.use_server)
+        to_stdout = not args.output_dir and settings.formats == ('html',)
+        result = convert_text(sys.stdin.read(), STDIN_NAME, settings, args.output_dir, keep_html=to_stdout)
+        if result.html is not None:
+            sys.stdout.write(result.html)
+            sys.stdout.flush()
+        report(result, args.quiet)
+        results.append(result)
+    for result in convert_many(paths, settings, args.output_dir, workers=args.jobs):
+        report(result, args.quiet)
+        results.append(result)
+
+    failed = [result for result in results if not result.ok]
+    elapsed = time.perf_counter() - start
+    print(f"{len(results) - len(failed)}/{len(results)} documents converted in {elapsed:.2f} s "
+          f"({sum(result.equations for result in results)} equations)", file=sys.stderr)
+    if results and not args.quiet:
+        slowest = max(results, key=lambda result: result.total)
+        print(f"slowest: {slowest.source} {slowest.total * 1000:.0f} ms", file=sys.stderr)
+    return EXIT_FAILED if failed or missing else EXIT_OK
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,14 +1,9 @@
+import time
+STARTED_AT = time.perf_counter()
 import ctypes
-import matplotlib
-matplotlib.use('TkAgg')
-import matplotlib.pyplot as plt
-from matplotlib import rcParams
 import tkinter as tk
-from src.config.settings import LOGGING_CONFIG, RC_PARAMS
 from src.gui.app_gui import LatexClipboardApp
 
-rcParams.update(RC_PARAMS)
-
 try:
     ctypes.windll.shcore.SetProcessDpiAwareness(2)
 except Exception:
@@ -16,5 +11,5 @@ except Exception:
 
 if __name__ == "__main__":
     root = tk.Tk()
-    app = LatexClipboardApp(root)
+    app = LatexClipboardApp(root, started_at=STARTED_AT)
     root.mainloop()
\ No newline at end of file
@@ -0,0 +1,46 @@
+import argparse
+import logging
+import sys
+from src.config.settings import CACHE_CONFIG, RENDER_SERVER_CONFIG, configure_matplotlib
+from src.utils.cache import RenderCache
+from src.utils.server import RenderServer
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Serve equation renders on localhost to the GUI, the CLI and scripts.")
+    parser.add_argument("--host", default=RENDER_SERVER_CONFIG['host'])
+    parser.add_argument("--port", type=int, default=RENDER_SERVER_CONFIG['port'])
+    parser.add_argument("--workers", type=int, default=RENDER_SERVER_CONFIG['workers'], help="Warm matplotlib worker processes")
+    parser.add_argument("--batch-window", type=float, default=RENDER_SERVER_CONFIG['batch_window'],
+                        help="Seconds to wait for concurrent requests to join a batch")
+    parser.add_argument("--max-batch", type=int, default=RENDER_SERVER_CONFIG['max_batch'])
+    parser.add_argument("--no-disk-cache", action="store_true")
+    parser.add_argument("--mathtext", action="store_true", help="Disable usetex (for machines without a TeX install)")
+    parser.add_argument("-v", "--verbose", action="store_true")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    if args.host not in ('127.0.0.1', 'localhost', '::1'):
+        print("error: the render server only binds to loopback addresses", file=sys.stderr)
+        return 2
+    configure_matplotlib(usetex=not args.mathtext)
+    # The GUI and CLI keep their own index over the same directory, so disk_bytes bounds each process, not the total.
+    cache = RenderCache(**dict(CACHE_CONFIG, disk_dir=None if args.no_disk_cache else CACHE_CONFIG['disk_dir']))
+    try:
+        server = RenderServer(args.host, args.port, workers=args.workers, usetex=not args.mathtext, cache=cache,
+                              batch_window=args.batch_window, max_batch=args.max_batch, timeout=RENDER_SERVER_CONFIG['timeout'])
+    except OSError as e:
+        print(f"error: cannot listen on {args.host}:{args.port}: {e}", file=sys.stderr)
+        return 1
+    server.warm_up()
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,7 +4,7 @@ ECHO Setting up and running LaTeX Clipboard Application...
 :: Check if Python is installed
 where python >nul 2>&1
 IF %ERRORLEVEL% NEQ 0 (
-    ECHO Python is not installed or not in PATH. Please install Python 3.8+.
+    ECHO Python is not installed or not in PATH. Please install Python 3.9+.
     pause
     exit /b 1
 )
@@ -1,12 +1,17 @@
+import atexit
 import logging
-from logging.handlers import RotatingFileHandler
+import os
+import queue
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+os.makedirs('./cache-and-logs', exist_ok=True)
 
 LOGGING_CONFIG = {
     'level': logging.INFO,
-    'handlers': [
-        RotatingFileHandler('./cache-and-logs/latex_clipboard.log', maxBytes=10*1024*1024, backupCount=5),
-        logging.StreamHandler()
-    ]
+    'file': './cache-and-logs/latex_clipboard.log',
+    'max_bytes': 10 * 1024 * 1024,
+    'backup_count': 5,
+    'format': '%(asctime)s %(levelname)s [%(threadName)s] %(message)s',
 }
 
 RC_PARAMS = {
@@ -21,12 +26,113 @@ RC_PARAMS = {
     'ytick.labelsize': 10,
 }
 
-def configure_logging(enabled):
-    logger = logging.getLogger()
-    logger.handlers.clear()
-    if enabled:
-        for handler in LOGGING_CONFIG['handlers']:
-            logger.addHandler(handler)
+RENDER_MODES = ("Matplotlib", "Standalone", "SVG", "Fast")
+
+FAST_MODE_CONFIG = {
+    'fallback': 'Standalone',
+    'fontset': 'stix',
+}
+
+SVG_CONFIG = {
+    'engine': 'matplotlib',
+    'hashsalt': 'latex-clipboard',
+}
+
+CACHE_CONFIG = {
+    'memory_entries': 512,
+    'disk_dir': './cache-and-logs/render-cache',
+    'disk_bytes': 256 * 1024 * 1024,
+}
+
+DVI_CACHE_CONFIG = {
+    'memory_entries': 256,
+    'disk_dir': './cache-and-logs/dvi-cache',
+    'disk_bytes': 32 * 1024 * 1024,
+}
+
+HISTORY_CONFIG = {
+    'entries': 8,
+    'memory_bytes': 64 * 1024 * 1024,
+}
+
+RENDER_POOL_CONFIG = {
+    'enabled': True,
+    'workers': max(1, (os.cpu_count() or 2) - 1),
+    'max_tasks_per_child': 100,
+}
+
+RENDER_JOB_CONFIG = {
+    'chunk_size': 8,
+    'incremental': True,
+}
+
+CLIPBOARD_CONFIG = {
+    'debounce': 0.15,
+    'timeout': 0.5,
+}
+
+RENDER_SERVER_CONFIG = {
+    'enabled': True,
+    'host': '127.0.0.1',
+    'port': 8765,
+    'workers': max(1, (os.cpu_count() or 2) - 1),
+    'timeout': 120.0,
+    'connect_timeout': 0.2,
+    'retry_after': 10.0,
+    'batch_window': 0.005,
+    'max_batch': 64,
+}
+
+TOOLCHAIN_CONFIG = {
+    'cache_file': './cache-and-logs/toolchain.json',
+}
+
+DOCX_EXPORT_CONFIG = {
+    'workers': min(8, os.cpu_count() or 2),
+}
+
+TRACING_CONFIG = {
+    'enabled': False,
+    'path': './cache-and-logs/trace.jsonl',
+    'max_bytes': 10 * 1024 * 1024,
+    'history': 500,
+}
+
+PNG_ENCODING = {
+    'compress_level': 6,
+    'quantize': 'palette',
+    'optimize': False,
+}
+
+def configure_matplotlib(usetex=True):
+    import matplotlib
+    matplotlib.use('Agg', force=True)
+    from matplotlib import rcParams
+    rcParams.update(RC_PARAMS)
+    if not usetex:
+        rcParams['text.usetex'] = False
+
+log_listener = None
+
+def configure_logging(enabled=True):
+    global log_listener
+    if log_listener is None:
+        # Handlers run on the listener thread, so render threads only pay for a queue put.
+        formatter = logging.Formatter(LOGGING_CONFIG['format'])
+        handlers = [RotatingFileHandler(LOGGING_CONFIG['file'], maxBytes=LOGGING_CONFIG['max_bytes'], backupCount=LOGGING_CONFIG['backup_count'],
+                                        encoding='utf-8', delay=True),
+                    logging.StreamHandler()]
+        for handler in handlers:
+            handler.setFormatter(formatter)
+        log_queue = queue.SimpleQueue()
+        log_listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+        log_listener.start()
+        atexit.register(log_listener.stop)
+        logger = logging.getLogger()
+        logger.handlers.clear()
+        logger.addHandler(QueueHandler(log_queue))
         logger.setLevel(LOGGING_CONFIG['level'])
-    else:
-        logger.addHandler(logging.NullHandler())
\ No newline at end of file
+    set_logging_enabled(enabled)
+
+def set_logging_enabled(enabled):
+    logging.disable(logging.NOTSET if enabled else logging.CRITICAL)
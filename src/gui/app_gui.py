@@ -1,7 +1,3 @@
-import base64
-import html
-import tempfile
-import time
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 import threading
@@ -9,30 +5,54 @@ import sys
 import logging
 import os
 import json
+import time
+import functools
+import queue
 from .components import create_settings_frame, create_actions_frame, create_io_frame
-from src.utils.clipboard import set_clipboard_html, get_clipboard_text
-from src.utils.latex import check_latex, find_latex_equations
-from src.utils.image import render_latex_to_image, is_image_empty, image_to_bytes
-from src.config.settings import configure_logging
+from src.utils.clipboard import ClipboardWatcher, default_backend, set_clipboard_payload
+from src.utils.latex import find_latex_equations
+from src.utils.cache import RenderCache
+from src.utils.history import RenderHistory
+from src.utils.pool import RenderPool
+from src.utils.toolchain import ToolchainProbe
+from src.utils.jobs import RenderJobQueue
+from src.utils.server import default_client
+from src.utils.tracing import configure_tracing, format_summary, tracer
+from src.config.settings import (configure_logging, configure_matplotlib, set_logging_enabled, CACHE_CONFIG, CLIPBOARD_CONFIG,
+                                 HISTORY_CONFIG, RENDER_JOB_CONFIG, RENDER_MODES, RENDER_POOL_CONFIG, TOOLCHAIN_CONFIG, TRACING_CONFIG)
+
+@functools.lru_cache(maxsize=None)
+def load_render_modules():
+    configure_matplotlib()
+    import src.utils.image
+    import src.utils.document
 
 class LatexClipboardApp:
-    def __init__(self, root):
+    def __init__(self, root, started_at=None):
+        self.started_at = time.perf_counter() if started_at is None else started_at
+        self.startup_timings = {}
         self.root = root
         self.root.title("LaTeX Clipboard Monitor")
         self.monitoring = False
         self.monitor_thread = None
         self.stop_event = threading.Event()
-        self.last_images = []
-        self.last_text = ""
-        self.last_equations = None
+        self.history = RenderHistory(**HISTORY_CONFIG)
+        self.monitor_settings = None
+        self.ui_calls = queue.Queue()
+        self.render_jobs = RenderJobQueue(self.post_to_ui)
+        self.render_cache = RenderCache(**CACHE_CONFIG)
+        self.render_pool = RenderPool(**RENDER_POOL_CONFIG)
+        self.render_server = default_client()
         self.defaults_file = os.path.join("configs", "defaults.json")
         self.logger_enabled = tk.BooleanVar(value=True)
-
-        if not check_latex():
-            messagebox.showerror("LaTeX Not Found", "LaTeX distribution (e.g., MiKTeX) with latex and dvipng required.")
-            sys.exit(1)
+        self.logger_enabled.trace_add("write", lambda *args: set_logging_enabled(self.logger_enabled.get()))
+        self.toolchain_probe = ToolchainProbe(**TOOLCHAIN_CONFIG)
+        self.tracing_enabled = tk.BooleanVar(value=TRACING_CONFIG['enabled'])
+        self.tracing_enabled.trace_add("write", lambda *args: tracer.set_enabled(self.tracing_enabled.get()))
+        self.stats_window = None
 
         configure_logging(self.logger_enabled.get())
+        configure_tracing(**TRACING_CONFIG)
         self.load_defaults()
         self.root.state('normal')
         self.root.attributes('-topmost', True)
@@ -41,7 +61,55 @@ class LatexClipboardApp:
         self.root.focus_force()
 
         self.create_gui()
-        logging.info("Application initialized.")
+        self.root.update_idletasks()
+        self.startup_timings['window'] = time.perf_counter() - self.started_at
+        self.toolchain_probe.start(before=self.load_render_modules)
+        self.root.after(50, self.check_toolchain_probe)
+        self.root.after(50, self.drain_ui_calls)
+        self.render_pool.start()
+        if self.render_server is not None:
+            self.render_server.is_available()
+        logging.info("Application initialized, window shown after %.0f ms", self.startup_timings['window'] * 1000)
+
+    def load_render_modules(self):
+        start = time.perf_counter()
+        load_render_modules()
+        self.startup_timings['render_modules'] = time.perf_counter() - start
+
+    def check_toolchain_probe(self):
+        probe = self.toolchain_probe
+        if not probe.done.is_set():
+            self.root.after(50, self.check_toolchain_probe)
+            return
+        self.startup_timings['toolchain_probe'] = probe.elapsed
+        self.startup_timings['ready'] = time.perf_counter() - self.started_at
+        logging.info("Startup: window %.0f ms, render modules %.0f ms, toolchain probe %.0f ms (%s), ready %.0f ms",
+                     self.startup_timings['window'] * 1000, self.startup_timings.get('render_modules', 0) * 1000,
+                     probe.elapsed * 1000, 'cached' if probe.cached else 'probed', self.startup_timings['ready'] * 1000)
+        if not probe.ok:
+            messagebox.showerror("LaTeX Not Found", "LaTeX distribution (e.g., MiKTeX) with latex and dvipng required.")
+            self.on_closing()
+            sys.exit(1)
+        if not self.monitoring:
+            self.status_var.set(f"Ready in {self.startup_timings['ready']:.1f} s")
+
+    def post_to_ui(self, callback, *args):
+        self.ui_calls.put((callback, args))
+
+    def drain_ui_calls(self):
+        while True:
+            try:
+                callback, args = self.ui_calls.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                callback(*args)
+            except Exception as e:
+                logging.error("UI callback failed: %s", e)
+        self.root.after(50, self.drain_ui_calls)
+
+    def set_status(self, text):
+        self.post_to_ui(self.status_var.set, text)
 
     def load_defaults(self):
         defaults = {
@@ -57,11 +125,11 @@ class LatexClipboardApp:
                 with open(self.defaults_file, 'r') as f:
                     loaded = json.load(f)
                 defaults.update({k: v for k, v in loaded.items() if k in defaults})
-                logging.info(f"Loaded defaults: {defaults}")
+                logging.info("Loaded defaults: %s", defaults)
             else:
                 logging.info("Using fallback defaults")
         except Exception as e:
-            logging.error(f"Failed to load defaults: {e}")
+            logging.error("Failed to load defaults: %s", e)
         self.default_settings = defaults
         self.logger_enabled.set(defaults["logger_enabled"])
 
@@ -70,9 +138,9 @@ class LatexClipboardApp:
             os.makedirs(os.path.dirname(self.defaults_file), exist_ok=True)
             with open(self.defaults_file, 'w') as f:
                 json.dump(settings, f, indent=4)
-            logging.info(f"Saved defaults: {settings}")
+            logging.info("Saved defaults: %s", settings)
         except Exception as e:
-            logging.error(f"Failed to save defaults: {e}")
+            logging.error("Failed to save defaults: %s", e)
             messagebox.showerror("Save Defaults Failed", f"Error: {e}")
 
     def create_gui(self):
@@ -81,8 +149,10 @@ class LatexClipboardApp:
         self.root.columnconfigure(0, weight=1)
         self.root.rowconfigure(0, weight=1)
 
-        self.settings_frame = create_settings_frame(main_frame, self.default_settings, self.logger_enabled, self.validate_inputs)
-        self.actions_frame = create_actions_frame(main_frame, self.toggle_monitoring, self.test_render, self.save_as_docx, self.open_defaults_dialog)
+        self.settings_frame = create_settings_frame(main_frame, self.default_settings, self.logger_enabled, self.validate_inputs,
+                                                    self.tracing_enabled)
+        self.actions_frame = create_actions_frame(main_frame, self.toggle_monitoring, self.test_render, self.save_as_docx, self.open_defaults_dialog,
+                                                  self.cancel_render, self.open_stats_panel)
         self.io_frame, self.text_input, self.status_var = create_io_frame(main_frame, self.render_input_text)
 
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
@@ -97,16 +167,16 @@ class LatexClipboardApp:
                 raise ValueError("DPI must be 100-600")
             return True
         except ValueError as e:
-            logging.error(f"Input validation failed: {e}")
+            logging.error("Input validation failed: %s", e)
             messagebox.showerror("Invalid Input", str(e))
             return False
 
     def toggle_monitoring(self):
-        configure_logging(self.logger_enabled.get())
         if not self.monitoring:
             if not self.validate_inputs(self.settings_frame.font_size_var, self.settings_frame.dpi_var):
                 return
             self.monitoring = True
+            self.monitor_settings = self.render_settings()
             self.status_var.set("Monitoring")
             self.actions_frame.toggle_button.configure(text="Stop Monitoring")
             self.disable_gui()
@@ -119,6 +189,7 @@ class LatexClipboardApp:
             self.actions_frame.toggle_button.configure(text="Start Monitoring")
             self.enable_gui()
             self.stop_event.set()
+            self.render_jobs.cancel_all("clipboard")
             logging.info("Stopped clipboard monitoring")
 
     def disable_gui(self):
@@ -138,92 +209,209 @@ class LatexClipboardApp:
         self.monitor_thread.start()
 
     def render_input_text(self):
-        configure_logging(self.logger_enabled.get())
         if not self.validate_inputs(self.settings_frame.font_size_var, self.settings_frame.dpi_var):
             return
         text = self.text_input.get("1.0", tk.END).strip()
         if not text:
             messagebox.showwarning("No Input", "Please enter text to render.")
             return
-        self.process_text(text, "input")
+        self.submit_render(text, "input", self.render_settings())
 
     def test_render(self):
-        configure_logging(self.logger_enabled.get())
         if not self.validate_inputs(self.settings_frame.font_size_var, self.settings_frame.dpi_var):
             return
         from templates.test_string import TEST_STRING
-        self.process_text(TEST_STRING, "test")
+        self.submit_render(TEST_STRING, "test", self.render_settings())
+
+    def render_settings(self):
+        return {
+            'mode': self.settings_frame.mode_var.get(),
+            'text_color': self.settings_frame.color_var.get(),
+            'font_size': int(self.settings_frame.font_size_var.get()),
+            'dpi': int(self.settings_frame.dpi_var.get()),
+            'only_images': self.settings_frame.only_images_var.get(),
+        }
 
-    def process_text(self, text, mode):
-        logging.info(f"Rendering {mode} text: {text[:100]}...")
-        try:
+    def submit_render(self, text, mode, settings):
+        job = self.render_jobs.submit(mode, lambda job: self.process_text(job, text, settings), on_done=self.on_render_done,
+                                      on_error=self.on_render_failed, on_progress=self.on_render_progress)
+        stats = self.render_jobs.stats()
+        if stats['running'] or stats['queue_depth'] > 1:
+            self.set_status(f"Queued {mode} render ({stats['queue_depth']} waiting)")
+        return job
+
+    def cancel_render(self):
+        job = self.render_jobs.cancel_running()
+        if job is not None:
+            self.status_var.set(f"Cancelling {job.kind} render")
+
+    def process_text(self, job, text, settings):
+        logging.info("Rendering %s text: %.100s...", job.kind, text)
+        with tracer.span('job', kind=job.kind, mode=settings['mode']) as span:
             equations = find_latex_equations(text)
-            images = [
-                render_latex_to_image(eq, self.settings_frame.color_var.get(), int(self.settings_frame.font_size_var.get()),
-                                      int(self.settings_frame.dpi_var.get()), mode=self.settings_frame.mode_var.get())
-                for eq in equations['equations']
-            ]
-            images = [img for img in images if img]
+            images = []
+            rendered = {}
+            if equations['equations']:
+                images, rendered = self.render_equations(equations['equations'], settings, job)
             if images:
-                self.copy_images(images, mode == "test", text, equations)
-                self.status_var.set(f"Copied {len(images)} images")
-                messagebox.showinfo(f"{mode.capitalize()} Render", f"Copied {len(images)} images")
-            else:
-                self.status_var.set("No valid images")
-                messagebox.showerror(f"{mode.capitalize()} Render", "Failed to render images")
-        except Exception as e:
-            logging.error(f"{mode.capitalize()} render failed: {e}")
-            messagebox.showerror(f"{mode.capitalize()} Render Failed", f"Error: {e}")
-            self.status_var.set(f"{mode.capitalize()} render failed")
+                job.checkpoint()
+                self.copy_images(images, job.kind == "test", text, equations, settings)
+            span.set(equations=len(equations['equations']), images=len(images))
+        return {'text': text, 'equations': equations, 'images': images, 'rendered': rendered}
+
+    def on_render_progress(self, job, done, total):
+        self.status_var.set(f"Rendering {done}/{total} equations")
+
+    def on_render_done(self, job, result):
+        stats = self.render_jobs.stats()
+        logging.info("Render jobs: depth %s, wait p50 %.0f ms, run p50 %.0f ms, superseded %s",
+                     stats['queue_depth'], stats['wait_p50_ms'], stats['run_p50_ms'], stats['superseded'])
+        images = result['images']
+        if images:
+            payload_kb = sum(img.payload_size for img in images) / 1024
+            self.history.add(result['text'], result['equations'], images, result['rendered'])
+            self.status_var.set(f"Copied {len(images)} images, {payload_kb:.0f} KB ({self.cache_summary()})")
+            if job.kind != "clipboard":
+                messagebox.showinfo(f"{job.kind.capitalize()} Render", f"Copied {len(images)} images")
+        elif job.kind == "clipboard":
+            self.status_var.set("No valid images" if result['equations']['equations'] else "No equations found")
+        else:
+            self.status_var.set("No valid images")
+            messagebox.showerror(f"{job.kind.capitalize()} Render", "Failed to render images")
+
+    def on_render_failed(self, job, error):
+        if job.kind == "clipboard":
+            self.status_var.set("Monitoring error")
+        else:
+            self.status_var.set(f"{job.kind.capitalize()} render failed")
+            messagebox.showerror(f"{job.kind.capitalize()} Render Failed", f"Error: {error}")
+
+    def render_equations(self, equations, settings, job=None):
+        load_render_modules()
+        from src.utils.image import render_equations, render_keys
+        latest = self.history.latest() if RENDER_JOB_CONFIG['incremental'] else None
+        previous = latest.rendered if latest is not None else None
+        keys = render_keys(equations, settings['text_color'], settings['font_size'], settings['dpi'], mode=settings['mode'])
+        images = render_equations(equations, settings['text_color'], settings['font_size'], settings['dpi'], mode=settings['mode'],
+                                  cache=self.render_cache, pool=self.render_pool, chunk_size=RENDER_JOB_CONFIG['chunk_size'],
+                                  checkpoint=job.checkpoint if job else None, progress=job.progress if job else None,
+                                  previous=previous, keys=keys, server=self.render_server)
+        rendered = {key: img for key, img in zip(keys, images) if img}
+        if previous:
+            reused = sum(1 for key in rendered if key in previous)
+            logging.info("Incremental render: reused %s of %s unique equations from the previous payload", reused, len(rendered))
+        stats = self.render_cache.stats()
+        logging.info("Render cache: %s memory hits, %s disk hits, %s misses", stats['memory_hits'], stats['disk_hits'], stats['misses'])
+        return [img for img in images if img], rendered
+
+    def cache_summary(self):
+        stats = self.render_cache.stats()
+        return f"cache {stats['memory_hits'] + stats['disk_hits']} hits / {stats['misses']} misses"
+
+    def open_stats_panel(self):
+        if self.stats_window is not None and self.stats_window.winfo_exists():
+            self.stats_window.lift()
+            return
+        self.stats_window = tk.Toplevel(self.root)
+        self.stats_window.title("Render Stats")
+        text = tk.Text(self.stats_window, width=78, height=30, font=("Courier", 10))
+        text.grid(row=0, column=0, sticky="nsew")
+        self.stats_window.columnconfigure(0, weight=1)
+        self.stats_window.rowconfigure(0, weight=1)
+        ttk.Button(self.stats_window, text="Reset", command=tracer.reset).grid(row=1, column=0, padx=5, pady=5, sticky="e")
+        self.refresh_stats_panel(text)
+
+    def refresh_stats_panel(self, text):
+        if self.stats_window is None or not self.stats_window.winfo_exists():
+            return
+        text.configure(state="normal")
+        text.delete("1.0", tk.END)
+        text.insert(tk.END, self.stats_report())
+        text.configure(state="disabled")
+        self.stats_window.after(1000, self.refresh_stats_panel, text)
+
+    def stats_report(self):
+        from src.utils.image import tex_intermediates
+        jobs = self.render_jobs.stats()
+        dvi = tex_intermediates.stats()
+        cache = self.render_cache.stats()
+        history = self.history.stats()
+        lines = [
+            f"Jobs: {jobs['completed']} done, {jobs['failed']} failed, {jobs['cancelled']} cancelled, {jobs['superseded']} superseded, "
+            f"queue {jobs['queue_depth']}",
+            f"Job wait p50 {jobs['wait_p50_ms']:.0f} ms, run p50 {jobs['run_p50_ms']:.0f} ms, run max {jobs['run_max_ms']:.0f} ms",
+            f"Cache: {cache['memory_hits']} memory hits, {cache['disk_hits']} disk hits, {cache['misses']} misses "
+            f"({cache['hit_rate']:.0%}), {cache['memory_entries']} in memory ({cache['resident_bytes'] / 1024 / 1024:.1f} MB), {cache['disk_bytes'] / 1024 / 1024:.1f} MB on disk",
+            f"History: {history['entries']} payloads, {history['equations']} images, {history['resident_bytes'] / 1024 / 1024:.1f} MB resident "
+            f"of {history['memory_bytes'] / 1024 / 1024:.0f} MB, {history['evicted']} evicted",
+            f"Render server: {self.render_server_status()}",
+            f"DVI cache: {dvi['memory_hits'] + dvi['disk_hits']} hits, {dvi['misses']} compiles, {dvi['disk_bytes'] / 1024 / 1024:.1f} MB on disk",
+            "",
+        ]
+        if not tracer.enabled:
+            lines.append("Tracing is off; enable it in Configuration to collect per-stage timings.")
+        summary = tracer.summary()
+        if summary['spans'] or summary['counters']:
+            lines.append(format_summary(summary))
+        if tracer.path:
+            lines.extend(["", f"Trace log: {tracer.path}"])
+        return "\n".join(lines)
+
+    def render_server_status(self):
+        server = self.render_server
+        if server is None:
+            return "disabled"
+        if not server.is_available():
+            return f"not running on {server.host}:{server.port}, rendering in-process"
+        return f"{server.host}:{server.port}"
 
     def save_as_docx(self):
-        configure_logging(self.logger_enabled.get())
-        if not self.last_images:
+        entry = self.history.latest()
+        if entry is None:
             messagebox.showwarning("No Images", "No images available to save.")
             return
-        from docx import Document
-        from docx.shared import Pt
-        import filedialog
         file_path = filedialog.asksaveasfilename(defaultextension=".docx", filetypes=[("Word Documents", "*.docx")])
         if not file_path:
             return
-        try:
-            doc = Document()
-            only_images = self.settings_frame.only_images_var.get()
-            if only_images or not self.last_text or not self.last_equations['matches']:
-                for img in self.last_images:
-                    with tempfile.NamedTemporaryFile(suffix=".png", delete=False) as tmp:
-                        img.save(tmp.name, format='PNG')
-                        doc.add_picture(tmp.name, width=Pt(300))
-                        os.unlink(tmp.name)
-            else:
-                last_pos = 0
-                img_index = 0
-                font_size = int(self.settings_frame.font_size_var.get())
-                for match in self.last_equations['matches']:
-                    start, end = match['start'], match['end']
-                    text_segment = self.last_text[last_pos:start].strip()
-                    if text_segment:
-                        doc.add_paragraph(text_segment).runs[0].font.size = Pt(font_size)
-                    if img_index < len(self.last_images):
-                        with tempfile.NamedTemporaryFile(suffix=".png", delete=False) as tmp:
-                            self.last_images[img_index].save(tmp.name, format='PNG')
-                            doc.add_paragraph().add_run().add_picture(tmp.name, width=Pt(300))
-                            os.unlink(tmp.name)
-                        img_index += 1
-                    last_pos = end
-                if remaining := self.last_text[last_pos:].strip():
-                    doc.add_paragraph(remaining).runs[0].font.size = Pt(font_size)
+        images, text, equations = entry.images, entry.text, entry.equations
+        font_size = int(self.settings_frame.font_size_var.get())
+        only_images = self.settings_frame.only_images_var.get()
+
+        def export(job):
+            from src.utils.document import build_docx
+            doc = build_docx(images, text, equations, font_size, only_images=only_images, progress=job.progress, checkpoint=job.checkpoint)
+            job.checkpoint()
             doc.save(file_path)
-            logging.info(f"Saved DOCX to {file_path}")
-            messagebox.showinfo("Save Successful", f"Saved to {file_path}")
+            return file_path
+
+        self.render_jobs.submit("export", export, on_done=self.on_export_done, on_error=self.on_export_failed,
+                                on_progress=self.on_export_progress)
+        self.status_var.set(f"Exporting {len(images)} images")
+
+    def on_export_progress(self, job, done, total):
+        images = total // 2
+        if done <= images:
+            self.status_var.set(f"Exporting: encoded {done}/{images} images")
+        else:
+            self.status_var.set(f"Exporting: wrote {done - images}/{images} images")
+
+    def on_export_done(self, job, file_path):
+        logging.info("Saved DOCX to %s in %.0f ms", file_path, (job.finished_at - job.started_at) * 1000)
+        self.history.compact()
+        self.status_var.set(f"Saved {os.path.basename(file_path)}")
+        messagebox.showinfo("Save Successful", f"Saved to {file_path}")
+        try:
             os.startfile(file_path)
         except Exception as e:
-            logging.error(f"Failed to save DOCX: {e}")
-            messagebox.showerror("Save Failed", f"Error: {e}")
+            logging.error("Failed to open %s: %s", file_path, e)
+
+    def on_export_failed(self, job, error):
+        logging.error("Failed to save DOCX: %s", error)
+        self.history.compact()
+        self.status_var.set("Export failed")
+        messagebox.showerror("Save Failed", f"Error: {error}")
 
     def open_defaults_dialog(self):
-        configure_logging(self.logger_enabled.get())
         dialog = tk.Toplevel(self.root)
         dialog.title("Set Default Settings")
         dialog.transient(self.root)
@@ -243,7 +431,7 @@ class LatexClipboardApp:
         }
 
         ttk.Label(frame, text="Default Render Mode:").grid(row=0, column=0, padx=10, pady=10, sticky="e")
-        ttk.OptionMenu(frame, vars["mode"], self.default_settings["mode"], "Matplotlib", "Standalone").grid(row=0, column=1, padx=10, pady=10, sticky="w")
+        ttk.OptionMenu(frame, vars["mode"], self.default_settings["mode"], *RENDER_MODES).grid(row=0, column=1, padx=10, pady=10, sticky="w")
 
         ttk.Label(frame, text="Default Text Color:").grid(row=1, column=0, padx=10, pady=10, sticky="e")
         ttk.OptionMenu(frame, vars["text_color"], self.default_settings["text_color"], "white", "black", "red", "blue", "green").grid(row=1, column=1, padx=10, pady=10, sticky="w")
@@ -287,91 +475,41 @@ class LatexClipboardApp:
         y = self.root.winfo_rooty() + (self.root.winfo_height() - height) // 2
         dialog.geometry(f"{width}x{height}+{x}+{y}")
 
-    def copy_images(self, images, test_mode, original_text, equations):
-        configure_logging(self.logger_enabled.get())
-        if not images:
-            logging.info("No images to copy")
-            return
-        self.last_images = [img for img in images if img and not is_image_empty(img)]
-        self.last_text = original_text
-        self.last_equations = equations
-
-        html_content = (
-            "<style>"
-            f"body {{color: {self.settings_frame.color_var.get()}; font-family: Arial, sans-serif; font-size: {self.settings_frame.font_size_var.get()}pt; line-height: 1.5;}}"
-            "p, div, span {color: inherit !important;}"
-            "img {vertical-align: middle; margin: 2px 0;}"
-            "</style>"
-        )
-
-        if test_mode or (original_text and equations['matches']):
-            if self.settings_frame.only_images_var.get():
-                html_content += "".join(
-                    f'<img src="data:image/png;base64,{base64.b64encode(image_to_bytes(img)).decode()}" style="vertical-align: middle; margin: 2px 0;">'
-                    for img in self.last_images
-                )
-            else:
-                last_pos = 0
-                img_index = 0
-                for match in equations['matches']:
-                    start, end = match['start'], match['end']
-                    text_segment = html.escape(original_text[last_pos:start]).replace('\n', '<br>')
-                    html_content += f'<span>{text_segment}</span>'
-                    if img_index < len(self.last_images):
-                        html_content += f'<img src="data:image/png;base64,{base64.b64encode(image_to_bytes(self.last_images[img_index])).decode()}" style="vertical-align: middle; margin: 2px 0;">'
-                        img_index += 1
-                    last_pos = end
-                html_content += f'<span>{html.escape(original_text[last_pos:]).replace("\n", "<br>")}</span>'
-        else:
-            html_content += "<br>".join(
-                f'<img src="data:image/png;base64,{base64.b64encode(image_to_bytes(img)).decode()}" style="vertical-align: middle; margin: 2px 0;">'
-                for img in self.last_images
-            )
-
+    def copy_images(self, images, test_mode, original_text, equations, settings):
+        from src.utils.document import build_cf_html
+        payload = build_cf_html(images, original_text, equations, settings['text_color'], settings['font_size'],
+                                only_images=settings['only_images'], test_mode=test_mode)
         try:
-            set_clipboard_html(html_content)
-            self.status_var.set(f"Copied {len(self.last_images)} images")
-            logging.info(f"Copied {len(self.last_images)} images")
+            set_clipboard_payload(payload)
+            payload_kb = sum(img.payload_size for img in images) / 1024
+            logging.info("Copied %s images, %.0f KB of base64 %s", len(images), payload_kb, images[0].extension.upper())
         except Exception as e:
-            logging.error(f"Failed to copy images: {e}")
-            self.status_var.set("Error copying images")
+            logging.error("Failed to copy images: %s", e)
+            raise
 
     def monitor_clipboard(self):
-        configure_logging(self.logger_enabled.get())
-        last_sequence = None
+        watcher = ClipboardWatcher(default_backend(), **CLIPBOARD_CONFIG)
         while not self.stop_event.is_set():
             try:
-                import win32clipboard
-                current_sequence = win32clipboard.GetClipboardSequenceNumber()
-                if current_sequence != last_sequence:
-                    last_sequence = current_sequence
-                    text = get_clipboard_text()
-                    if text:
-                        logging.info(f"New clipboard content: {text[:100]}...")
-                        equations = find_latex_equations(text)
-                        if equations['equations']:
-                            images = [
-                                render_latex_to_image(eq, self.settings_frame.color_var.get(), int(self.settings_frame.font_size_var.get()),
-                                                      int(self.settings_frame.dpi_var.get()), mode=self.settings_frame.mode_var.get())
-                                for eq in equations['equations']
-                            ]
-                            images = [img for img in images if img]
-                            if images:
-                                self.copy_images(images, False, text, equations)
-                            else:
-                                self.status_var.set("No valid images")
-                        else:
-                            self.status_var.set("No equations found")
-                time.sleep(1)
+                for text in watcher.changes(self.stop_event):
+                    self.handle_clipboard_text(text)
             except Exception as e:
-                logging.error(f"Clipboard monitoring error: {e}")
-                self.status_var.set("Monitoring error")
-                time.sleep(1)
+                logging.error("Clipboard monitoring error: %s", e)
+                self.set_status("Monitoring error")
+                self.stop_event.wait(1)
+        logging.info("Clipboard watcher saw %s changes, coalesced %s", watcher.changes_seen, watcher.changes_coalesced)
+
+    def handle_clipboard_text(self, text):
+        logging.info("New clipboard content: %.100s...", text)
+        self.submit_render(text, "clipboard", self.monitor_settings)
 
     def on_closing(self):
         if self.monitoring:
             self.stop_event.set()
             if self.monitor_thread:
                 self.monitor_thread.join(timeout=1.0)
+        self.render_jobs.shutdown()
+        self.render_pool.shutdown()
+        tracer.close()
         self.root.destroy()
         logging.info("Application closed")
\ No newline at end of file
@@ -1,8 +1,9 @@
 import tkinter as tk
 from tkinter import ttk
 import tkinter.font as tkfont
+from src.config.settings import RENDER_MODES
 
-def create_settings_frame(parent, defaults, logger_enabled, validate_inputs):
+def create_settings_frame(parent, defaults, logger_enabled, validate_inputs, tracing_enabled):
     class SettingsFrame:
         def __init__(self):
             self.frame = ttk.LabelFrame(parent, text="Configuration", padding="5")
@@ -17,7 +18,7 @@ def create_settings_frame(parent, defaults, logger_enabled, validate_inputs):
             self.only_images_var = tk.BooleanVar(value=defaults["only_images"])
 
             ttk.Label(self.frame, text="Render Mode:").grid(row=0, column=0, padx=5, pady=5, sticky="e")
-            self.mode_menu = ttk.OptionMenu(self.frame, self.mode_var, defaults["mode"], "Matplotlib", "Standalone")
+            self.mode_menu = ttk.OptionMenu(self.frame, self.mode_var, defaults["mode"], *RENDER_MODES)
             self.mode_menu["menu"].configure(font=menu_font)
             self.mode_menu.grid(row=0, column=1, padx=5, pady=5, sticky="w")
 
@@ -40,9 +41,12 @@ def create_settings_frame(parent, defaults, logger_enabled, validate_inputs):
             self.logger_check = ttk.Checkbutton(self.frame, text="Enable Logging", variable=logger_enabled)
             self.logger_check.grid(row=5, column=0, columnspan=2, padx=5, pady=5, sticky="w")
 
+            self.tracing_check = ttk.Checkbutton(self.frame, text="Enable Tracing", variable=tracing_enabled)
+            self.tracing_check.grid(row=6, column=0, columnspan=2, padx=5, pady=5, sticky="w")
+
     return SettingsFrame()
 
-def create_actions_frame(parent, toggle_monitoring, test_render, save_as_docx, open_defaults_dialog):
+def create_actions_frame(parent, toggle_monitoring, test_render, save_as_docx, open_defaults_dialog, cancel_render, open_stats_panel):
     class ActionsFrame:
         def __init__(self):
             self.frame = ttk.LabelFrame(parent, text="Actions", padding="5")
@@ -60,6 +64,12 @@ def create_actions_frame(parent, toggle_monitoring, test_render, save_as_docx, o
             self.defaults_button = ttk.Button(self.frame, text="Defaults", command=open_defaults_dialog)
             self.defaults_button.grid(row=0, column=3, padx=5, pady=5)
 
+            self.cancel_button = ttk.Button(self.frame, text="Cancel Render", command=cancel_render)
+            self.cancel_button.grid(row=0, column=4, padx=5, pady=5)
+
+            self.stats_button = ttk.Button(self.frame, text="Stats", command=open_stats_panel)
+            self.stats_button.grid(row=0, column=5, padx=5, pady=5)
+
     return ActionsFrame()
 
 def create_io_frame(parent, render_input_text):
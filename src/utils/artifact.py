@@ -0,0 +1,277 @@
+import base64
+import io
+import re
+import numpy as np
+from PIL import Image
+from src.utils.tracing import traced
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+# pre opcode followed by the DVI format id.
+DVI_SIGNATURE = b'\xf7\x02'
+
+SVG_SIZE_PATTERN = re.compile(rb'<svg\b[^>]*?\bwidth="([\d.]+)px"[^>]*?\bheight="([\d.]+)px"')
+
+def single_color(pixels):
+    alpha = pixels[:, :, 3]
+    ink = alpha > 0
+    if not ink.any():
+        return None
+    rgb = pixels[:, :, :3][ink]
+    first = rgb[0]
+    if (rgb == first).all():
+        return tuple(int(c) for c in first)
+    return None
+
+def image_bytes(image):
+    return image.width * image.height * len(image.getbands()) if image is not None else 0
+
+def buffer_bytes(*buffers):
+    return sum(len(buffer) for buffer in buffers if buffer is not None)
+
+def tint_mask(mask, color):
+    alpha = np.asarray(mask)
+    pixels = np.empty(alpha.shape + (4,), dtype=np.uint8)
+    # Agg leaves uncovered pixels white at zero alpha and gives covered ones the exact text color.
+    pixels[:, :, :3] = np.where((alpha > 0)[:, :, None], np.array(color, dtype=np.uint8), np.uint8(255))
+    pixels[:, :, 3] = alpha
+    return Image.fromarray(pixels, 'RGBA')
+
+def save_png(image, **save_args):
+    buffer = io.BytesIO()
+    image.save(buffer, format='PNG', **save_args)
+    return buffer.getvalue()
+
+@traced('encode.png')
+def encode_png(image, compress_level=6, quantize='palette', optimize=False):
+    if image.mode != 'RGBA':
+        image = image.convert('RGBA')
+    color = single_color(np.asarray(image)) if quantize else None
+    if color is not None:
+        return encode_mask_png(image.getchannel('A'), color, compress_level, quantize, optimize)
+    return save_png(image, compress_level=compress_level, optimize=optimize)
+
+@traced('encode.mask_png')
+def encode_mask_png(mask, color, compress_level=6, quantize='palette', optimize=False):
+    if not quantize:
+        return save_png(tint_mask(mask, color), compress_level=compress_level, optimize=optimize)
+    if quantize == 'la' and color[0] == color[1] == color[2]:
+        return save_png(Image.merge('LA', (Image.new('L', mask.size, color[0]), mask)), compress_level=compress_level, optimize=optimize)
+    # The mask bytes are the palette indices: every entry carries the text color at its own alpha.
+    image = Image.frombytes('P', mask.size, mask.tobytes())
+    image.putpalette(list(color) * 256)
+    return save_png(image, compress_level=compress_level, optimize=optimize, transparency=bytes(range(256)))
+
+class MaskArtifact:
+    __slots__ = ('_mask', '_png')
+    extension = 'png'
+
+    def __init__(self, mask=None, png=None):
+        if mask is None and png is None:
+            raise ValueError("MaskArtifact needs a mask or PNG bytes")
+        self._mask = mask
+        self._png = png
+
+    @classmethod
+    def from_png(cls, png):
+        if not is_mask_png(png):
+            raise ValueError("Not a grayscale PNG stream")
+        return cls(png=png)
+
+    @property
+    def mask(self):
+        if self._mask is None:
+            self._mask = Image.open(io.BytesIO(self._png))
+            self._mask.load()
+        return self._mask
+
+    @property
+    def size(self):
+        return self.mask.size
+
+    def payload_bytes(self):
+        if self._png is None:
+            self._png = save_png(self._mask, compress_level=6)
+        return self._png
+
+    def tinted(self, color, encoding=None):
+        return RenderedArtifact(mask=self.mask, color=color, encoding=encoding)
+
+    def resident_bytes(self):
+        return image_bytes(self._mask) + buffer_bytes(self._png)
+
+class RenderedArtifact:
+    __slots__ = ('_image', '_png', '_base64', '_mask', 'color', 'encoding')
+    mime_type = 'image/png'
+    extension = 'png'
+
+    def __init__(self, image=None, png=None, encoding=None, mask=None, color=None):
+        if image is None and png is None and mask is None:
+            raise ValueError("RenderedArtifact needs an image, PNG bytes or a coverage mask")
+        self._image = image
+        self._png = png
+        self._mask = mask
+        self.color = color
+        self._base64 = None
+        self.encoding = encoding or {}
+
+    @classmethod
+    def from_png(cls, png, encoding=None):
+        if not png.startswith(PNG_SIGNATURE):
+            raise ValueError("Not a PNG stream")
+        return cls(png=png, encoding=encoding)
+
+    @property
+    def image(self):
+        if self._image is None:
+            if self._mask is not None:
+                self._image = tint_mask(self._mask, self.color)
+            else:
+                image = Image.open(io.BytesIO(self._png))
+                self._image = image.convert('RGBA') if image.mode != 'RGBA' else image
+        return self._image
+
+    @property
+    def size(self):
+        if self._image is not None:
+            return self._image.size
+        if self._mask is not None:
+            return self._mask.size
+        with Image.open(io.BytesIO(self._png)) as image:
+            return image.size
+
+    def png_bytes(self):
+        if self._png is None:
+            if self._mask is not None:
+                self._png = encode_mask_png(self._mask, self.color, **self.encoding)
+            else:
+                self._png = encode_png(self._image, **self.encoding)
+        return self._png
+
+    def payload_bytes(self):
+        return self.png_bytes()
+
+    def mask_artifact(self):
+        return MaskArtifact(mask=self._mask) if self._mask is not None else None
+
+    def compacted(self):
+        # A copy holding only the encoded PNG; pixels and base64 are rebuilt from it on demand. The original may be
+        # shared with the render cache and a running job, so it is never trimmed in place.
+        if self._image is None and self._mask is None and self._base64 is None:
+            return self
+        return RenderedArtifact(png=self.png_bytes(), encoding=self.encoding)
+
+    def resident_bytes(self):
+        return image_bytes(self._image) + image_bytes(self._mask) + buffer_bytes(self._png, self._base64)
+
+    def base64_bytes(self):
+        if self._base64 is None:
+            self._base64 = base64.b64encode(self.png_bytes())
+        return self._base64
+
+    def base64(self):
+        return self.base64_bytes().decode('ascii')
+
+    def data_uri(self):
+        return f"data:{self.mime_type};base64,{self.base64()}"
+
+    @property
+    def payload_size(self):
+        return len(self.base64_bytes())
+
+class SvgArtifact:
+    __slots__ = ('svg', 'raster', '_image', '_png', '_base64')
+    mime_type = 'image/svg+xml'
+    extension = 'svg'
+
+    def __init__(self, svg, raster=None):
+        self.svg = svg
+        # Called once to get pixels for consumers that cannot take SVG, such as python-docx.
+        self.raster = raster
+        self._image = None
+        self._png = None
+        self._base64 = None
+
+    @classmethod
+    def from_svg(cls, svg, raster=None):
+        if not svg.lstrip().startswith(b'<svg'):
+            raise ValueError("Not an SVG document")
+        return cls(svg, raster)
+
+    @property
+    def image(self):
+        if self._image is None:
+            if self.raster is None:
+                raise ValueError("SVG artifact has no raster fallback")
+            self._image = self.raster()
+        return self._image
+
+    @property
+    def size(self):
+        match = SVG_SIZE_PATTERN.search(self.svg)
+        return (round(float(match.group(1))), round(float(match.group(2)))) if match else (0, 0)
+
+    def png_bytes(self):
+        if self._png is None:
+            self._png = encode_png(self.image)
+        return self._png
+
+    def payload_bytes(self):
+        return self.svg
+
+    def compacted(self):
+        if self._image is None and self._base64 is None:
+            return self
+        artifact = SvgArtifact(self.svg, self.raster)
+        artifact._png = self._png
+        return artifact
+
+    def resident_bytes(self):
+        return image_bytes(self._image) + buffer_bytes(self.svg, self._png, self._base64)
+
+    def base64_bytes(self):
+        if self._base64 is None:
+            self._base64 = base64.b64encode(self.svg)
+        return self._base64
+
+    def base64(self):
+        return self.base64_bytes().decode('ascii')
+
+    def data_uri(self):
+        return f"data:{self.mime_type};base64,{self.base64()}"
+
+    @property
+    def payload_size(self):
+        return len(self.base64_bytes())
+
+class DviArtifact:
+    __slots__ = ('dvi',)
+    extension = 'dvi'
+
+    def __init__(self, dvi):
+        self.dvi = dvi
+
+    @classmethod
+    def from_dvi(cls, dvi):
+        if not dvi.startswith(DVI_SIGNATURE):
+            raise ValueError("Not a DVI file")
+        return cls(dvi)
+
+    def payload_bytes(self):
+        return self.dvi
+
+    def resident_bytes(self):
+        return len(self.dvi)
+
+def is_mask_png(data):
+    # Byte 25 is the IHDR color type; rendered artifacts are never plain grayscale, cached masks always are.
+    return data.startswith(PNG_SIGNATURE) and len(data) > 25 and data[25] == 0
+
+def artifact_from_bytes(data):
+    if is_mask_png(data):
+        return MaskArtifact.from_png(data)
+    if data.startswith(PNG_SIGNATURE):
+        return RenderedArtifact.from_png(data)
+    if data.startswith(DVI_SIGNATURE):
+        return DviArtifact.from_dvi(data)
+    return SvgArtifact.from_svg(data)
@@ -0,0 +1,167 @@
+import concurrent.futures
+import glob
+import logging
+import multiprocessing
+import os
+import time
+from src.config.settings import CACHE_CONFIG, RENDER_MODES, configure_matplotlib
+
+DEFAULT_PATTERNS = ('*.md', '*.markdown', '*.txt')
+
+STDIN_NAME = '<stdin>'
+
+class ConversionSettings:
+    __slots__ = ('mode', 'text_color', 'font_size', 'dpi', 'only_images', 'formats', 'usetex', 'use_server')
+
+    def __init__(self, mode="Matplotlib", text_color="black", font_size=12, dpi=300, only_images=False, formats=('html',), usetex=True,
+                 use_server=True):
+        self.mode = mode
+        self.text_color = text_color
+        self.font_size = int(font_size)
+        self.dpi = int(dpi)
+        self.only_images = only_images
+        self.formats = tuple(formats)
+        self.usetex = usetex
+        self.use_server = use_server
+
+    def validate(self):
+        if not 10 <= self.font_size <= 50:
+            raise ValueError("Font size must be 10-50")
+        if not 100 <= self.dpi <= 600:
+            raise ValueError("DPI must be 100-600")
+        if self.mode not in RENDER_MODES:
+            raise ValueError(f"Unknown render mode: {self.mode}")
+        unknown = set(self.formats) - {'html', 'docx'}
+        if unknown:
+            raise ValueError(f"Unknown output format: {', '.join(sorted(unknown))}")
+
+class ConversionResult:
+    __slots__ = ('source', 'outputs', 'equations', 'rendered', 'timings', 'error', 'html')
+
+    def __init__(self, source):
+        self.source = source
+        self.outputs = []
+        self.equations = 0
+        self.rendered = 0
+        self.timings = {}
+        self.error = None
+        self.html = None
+
+    @property
+    def ok(self):
+        return self.error is None
+
+    @property
+    def total(self):
+        return sum(self.timings.values())
+
+def expand_inputs(inputs, patterns=DEFAULT_PATTERNS):
+    paths = []
+    missing = []
+    for item in inputs:
+        if item == '-':
+            paths.append(STDIN_NAME)
+        elif os.path.isdir(item):
+            found = set()
+            for pattern in patterns:
+                found.update(glob.glob(os.path.join(item, '**', pattern), recursive=True))
+            paths.extend(sorted(found))
+        elif os.path.isfile(item):
+            paths.append(item)
+        else:
+            matched = sorted(path for path in glob.glob(item, recursive=True) if os.path.isfile(path))
+            if matched:
+                paths.extend(matched)
+            else:
+                missing.append(item)
+    return list(dict.fromkeys(paths)), missing
+
+def output_path(source, output_dir, extension):
+    stem = 'stdin' if source == STDIN_NAME else os.path.splitext(os.path.basename(source))[0]
+    directory = output_dir if output_dir else ('.' if source == STDIN_NAME else os.path.dirname(source))
+    return os.path.join(directory, f"{stem}.{extension}")
+
+_worker_cache = None
+_worker_server = None
+
+def init_worker(usetex=True, use_server=True):
+    global _worker_cache, _worker_server
+    configure_matplotlib(usetex)
+    from src.utils.cache import RenderCache
+    _worker_cache = RenderCache(**CACHE_CONFIG)
+    if use_server:
+        from src.utils.server import default_client
+        _worker_server = default_client(usetex)
+        if _worker_server is not None:
+            _worker_server.probe()
+
+def convert_text(text, source, settings, output_dir=None, keep_html=False):
+    from src.utils.document import build_docx, build_html_document
+    from src.utils.image import render_equations
+    from src.utils.latex import find_latex_equations
+    result = ConversionResult(source)
+    try:
+        start = time.perf_counter()
+        equations = find_latex_equations(text)
+        result.timings['detect'] = time.perf_counter() - start
+        result.equations = len(equations['equations'])
+
+        start = time.perf_counter()
+        images = render_equations(equations['equations'], settings.text_color, settings.font_size, settings.dpi,
+                                  mode=settings.mode, cache=_worker_cache, server=_worker_server)
+        images = [img for img in images if img]
+        result.timings['render'] = time.perf_counter() - start
+        result.rendered = len(images)
+        if result.equations and not images:
+            raise RuntimeError("No equations could be rendered")
+
+        if 'html' in settings.formats:
+            start = time.perf_counter()
+            document = build_html_document(images, text, equations, settings.text_color, settings.font_size,
+                                           only_images=settings.only_images)
+            if keep_html:
+                result.html = document
+            else:
+                path = output_path(source, output_dir, 'html')
+                with open(path, 'w', encoding='utf-8') as f:
+                    f.write(document)
+                result.outputs.append(path)
+            result.timings['html'] = time.perf_counter() - start
+
+        if 'docx' in settings.formats:
+            start = time.perf_counter()
+            path = output_path(source, output_dir, 'docx')
+            build_docx(images, text, equations, settings.font_size, only_images=settings.only_images).save(path)
+            result.outputs.append(path)
+            result.timings['docx'] = time.perf_counter() - start
+    except Exception as e:
+        logging.error("Conversion of %s failed: %s", source, e)
+        result.error = str(e)
+    return result
+
+def convert_file(path, settings, output_dir=None):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            text = f.read()
+    except Exception as e:
+        result = ConversionResult(path)
+        result.error = str(e)
+        return result
+    return convert_text(text, path, settings, output_dir)
+
+def convert_many(paths, settings, output_dir=None, workers=1):
+    if workers <= 1 or len(paths) <= 1:
+        init_worker(settings.usetex, settings.use_server)
+        for path in paths:
+            yield convert_file(path, settings, output_dir)
+        return
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                                                initializer=init_worker, initargs=(settings.usetex, settings.use_server)) as executor:
+        futures = {executor.submit(convert_file, path, settings, output_dir): path for path in paths}
+        for future in concurrent.futures.as_completed(futures):
+            try:
+                yield future.result()
+            except Exception as e:
+                result = ConversionResult(futures[future])
+                result.error = f"Worker failed: {e}"
+                yield result
@@ -0,0 +1,163 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from src.utils.tracing import tracer
+
+ARTIFACT_EXTENSIONS = ('.png', '.svg', '.dvi')
+
+# Bump whenever a renderer's output changes for the same inputs, so entries already on disk stop matching.
+# 2: Standalone equations typeset at their point size and scaled by dvipng resolution.
+RENDER_PIPELINE_VERSION = 2
+
+def normalize_equation(latex_string):
+    return " ".join(latex_string.split())
+
+def render_cache_key(latex_string, text_color, font_size, dpi, mode, preamble):
+    payload = json.dumps([RENDER_PIPELINE_VERSION, normalize_equation(latex_string), text_color, int(font_size), int(dpi), mode, preamble])
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+class RenderCache:
+    def __init__(self, memory_entries=512, disk_dir=None, disk_bytes=256 * 1024 * 1024, name='cache'):
+        self.name = name
+        self.memory_entries = memory_entries
+        self.disk_dir = disk_dir
+        self.disk_bytes = disk_bytes
+        self.lock = threading.Lock()
+        self.memory = OrderedDict()
+        self.disk_index = None
+        self.disk_total = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def get(self, key, count_miss=True):
+        with self.lock:
+            artifact = self.memory.get(key)
+            if artifact is not None:
+                self.memory.move_to_end(key)
+                self.memory_hits += 1
+                tracer.count(f'{self.name}.memory_hits')
+                return artifact
+        artifact = self._disk_get(key)
+        with self.lock:
+            if artifact is None:
+                if count_miss:
+                    self.misses += 1
+                    tracer.count(f'{self.name}.misses')
+                return None
+            self.disk_hits += 1
+            tracer.count(f'{self.name}.disk_hits')
+            self._memory_put(key, artifact)
+        return artifact
+
+    def put(self, key, artifact, disk=True):
+        if artifact is None:
+            return
+        with self.lock:
+            self._memory_put(key, artifact)
+        if disk:
+            self._disk_put(key, artifact)
+
+    def clear(self):
+        with self.lock:
+            self.memory.clear()
+
+    def stats(self):
+        with self.lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                'memory_hits': self.memory_hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'hit_rate': (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+                'memory_entries': len(self.memory),
+                'resident_bytes': sum(artifact.resident_bytes() for artifact in self.memory.values()),
+                'disk_entries': len(self.disk_index) if self.disk_index is not None else 0,
+                'disk_bytes': self.disk_total,
+            }
+
+    def _memory_put(self, key, artifact):
+        self.memory[key] = artifact
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.memory_entries:
+            self.memory.popitem(last=False)
+
+    def _disk_path(self, key, extension='png'):
+        return os.path.join(self.disk_dir, key[:2], f"{key}.{extension}")
+
+    def _load_disk_index(self):
+        if self.disk_index is not None:
+            return
+        index = OrderedDict()
+        entries = []
+        if os.path.isdir(self.disk_dir):
+            for root, _, files in os.walk(self.disk_dir):
+                for name in files:
+                    if name.endswith(ARTIFACT_EXTENSIONS):
+                        stat = os.stat(os.path.join(root, name))
+                        entries.append((stat.st_mtime, name[:-4], stat.st_size))
+        for _, key, size in sorted(entries):
+            index[key] = size
+        self.disk_index = index
+        self.disk_total = sum(index.values())
+
+    def _disk_get(self, key):
+        if not self.disk_dir:
+            return None
+        from src.utils.artifact import artifact_from_bytes
+        for extension in ARTIFACT_EXTENSIONS:
+            path = self._disk_path(key, extension[1:])
+            try:
+                with open(path, 'rb') as f:
+                    artifact = artifact_from_bytes(f.read())
+                os.utime(path)
+                break
+            except FileNotFoundError:
+                continue
+            except Exception as e:
+                logging.error("Render cache read failed for %s: %s", key, e)
+                return None
+        else:
+            return None
+        with self.lock:
+            self._load_disk_index()
+            if key in self.disk_index:
+                self.disk_index.move_to_end(key)
+        return artifact
+
+    def _disk_put(self, key, artifact):
+        if not self.disk_dir:
+            return
+        path = self._disk_path(key, artifact.extension)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            payload = artifact.payload_bytes()
+            with open(tmp_path, 'wb') as f:
+                f.write(payload)
+            os.replace(tmp_path, path)
+            size = len(payload)
+        except Exception as e:
+            logging.error("Render cache write failed for %s: %s", key, e)
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            return
+        with self.lock:
+            self._load_disk_index()
+            self.disk_total += size - self.disk_index.get(key, 0)
+            self.disk_index[key] = size
+            self.disk_index.move_to_end(key)
+            evicted = []
+            while self.disk_total > self.disk_bytes and len(self.disk_index) > 1:
+                old_key, old_size = self.disk_index.popitem(last=False)
+                self.disk_total -= old_size
+                evicted.append(old_key)
+        for old_key in evicted:
+            for extension in ARTIFACT_EXTENSIONS:
+                try:
+                    os.unlink(self._disk_path(old_key, extension[1:]))
+                except FileNotFoundError:
+                    pass
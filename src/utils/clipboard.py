@@ -1,53 +1,243 @@
-import win32clipboard
 import logging
 import base64
 import re
+import threading
+import time
+from src.utils.tracing import traced
 
-def set_clipboard_html(html_content):
-    if not html_content or not isinstance(html_content, str):
-        raise ValueError("HTML content must be non-empty string")
-    try:
+WM_CLIPBOARDUPDATE = 0x031D
+
+class ClipboardBackend:
+    def get_text(self):
+        raise NotImplementedError
+
+    def set_html(self, cf_html):
+        raise NotImplementedError
+
+    def sequence_number(self):
+        raise NotImplementedError
+
+    def wait_for_change(self, last_sequence, timeout):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+class MemoryClipboardBackend(ClipboardBackend):
+    def __init__(self, text=None):
+        self.condition = threading.Condition()
+        self.text = text
+        self.html = None
+        self.sequence = 1 if text is not None else 0
+
+    def copy_text(self, text):
+        with self.condition:
+            self.text = text
+            self.html = None
+            self.sequence += 1
+            self.condition.notify_all()
+
+    def get_text(self):
+        with self.condition:
+            return self.text
+
+    def set_html(self, cf_html):
+        with self.condition:
+            self.text = None
+            self.html = cf_html
+            self.sequence += 1
+            self.condition.notify_all()
+
+    def sequence_number(self):
+        with self.condition:
+            return self.sequence
+
+    def wait_for_change(self, last_sequence, timeout):
+        with self.condition:
+            self.condition.wait_for(lambda: self.sequence != last_sequence, timeout)
+            return self.sequence
+
+class Win32ClipboardBackend(ClipboardBackend):
+    def __init__(self, poll_interval=0.1):
+        import win32clipboard
+        self.win32clipboard = win32clipboard
+        self.poll_interval = poll_interval
+        self.condition = threading.Condition()
+        self.listener_thread = None
+        self.listening = False
+        self.hwnd = None
+
+    def get_text(self):
+        win32clipboard = self.win32clipboard
+        win32clipboard.OpenClipboard()
+        try:
+            if win32clipboard.IsClipboardFormatAvailable(win32clipboard.CF_UNICODETEXT):
+                return win32clipboard.GetClipboardData(win32clipboard.CF_UNICODETEXT)
+            return None
+        finally:
+            win32clipboard.CloseClipboard()
+
+    def set_html(self, cf_html):
+        win32clipboard = self.win32clipboard
         CF_HTML = win32clipboard.RegisterClipboardFormat("HTML Format")
-        html_header = (
-            "Version:0.9\r\n"
-            "StartHTML:0000000105\r\n"
-            "EndHTML:{:010d}\r\n"
-            "StartFragment:0000000141\r\n"
-            "EndFragment:{:010d}\r\n"
-            "<html><body>\r\n"
-            "<!--StartFragment-->{}<!--EndFragment-->\r\n"
-            "</body></html>"
-        )
-        fragment = html_content
-        full_html = html_header.format(
-            len(html_header) + len(fragment),
-            len(html_header) + len(fragment) - len("<!--EndFragment-->\r\n</body></html>"),
-            fragment
-        )
         win32clipboard.OpenClipboard()
         try:
             win32clipboard.EmptyClipboard()
-            win32clipboard.SetClipboardData(CF_HTML, full_html.encode('utf-8'))
-            logging.info("Set HTML to clipboard")
+            win32clipboard.SetClipboardData(CF_HTML, cf_html)
         finally:
             win32clipboard.CloseClipboard()
-    except Exception as e:
-        logging.error(f"Failed to set clipboard HTML: {e}")
-        raise
 
-def get_clipboard_text():
+    def sequence_number(self):
+        return self.win32clipboard.GetClipboardSequenceNumber()
+
+    def wait_for_change(self, last_sequence, timeout):
+        self.start_listener()
+        deadline = time.monotonic() + timeout
+        with self.condition:
+            while True:
+                current = self.sequence_number()
+                remaining = deadline - time.monotonic()
+                if current != last_sequence or remaining <= 0:
+                    return current
+                self.condition.wait(remaining if self.listening else min(remaining, self.poll_interval))
+
+    def start_listener(self):
+        if self.listener_thread is not None:
+            return
+        ready = threading.Event()
+        self.listener_thread = threading.Thread(target=self.listen, args=(ready,), daemon=True)
+        self.listener_thread.start()
+        ready.wait(timeout=2.0)
+
+    def listen(self, ready):
+        try:
+            import ctypes
+            import win32api
+            import win32con
+            import win32gui
+            window_class = win32gui.WNDCLASS()
+            window_class.lpfnWndProc = self.window_proc
+            window_class.lpszClassName = "LatexClipboardListener"
+            window_class.hInstance = win32api.GetModuleHandle(None)
+            atom = win32gui.RegisterClass(window_class)
+            self.hwnd = win32gui.CreateWindow(atom, "LatexClipboardListener", 0, 0, 0, 0, 0, win32con.HWND_MESSAGE, 0, window_class.hInstance, None)
+            if not ctypes.windll.user32.AddClipboardFormatListener(self.hwnd):
+                raise OSError("AddClipboardFormatListener failed")
+            self.listening = True
+            logging.info("Listening for clipboard updates")
+        except Exception as e:
+            logging.error("Clipboard listener unavailable, polling every %ss: %s", self.poll_interval, e)
+            ready.set()
+            return
+        ready.set()
+        win32gui.PumpMessages()
+        self.listening = False
+
+    def window_proc(self, hwnd, msg, wparam, lparam):
+        import win32gui
+        if msg == WM_CLIPBOARDUPDATE:
+            with self.condition:
+                self.condition.notify_all()
+            return 0
+        if msg == 0x0002:  # WM_DESTROY
+            win32gui.PostQuitMessage(0)
+            return 0
+        return win32gui.DefWindowProc(hwnd, msg, wparam, lparam)
+
+    def close(self):
+        if self.hwnd:
+            import ctypes
+            import win32gui
+            ctypes.windll.user32.RemoveClipboardFormatListener(self.hwnd)
+            win32gui.PostMessage(self.hwnd, 0x0010, 0, 0)  # WM_CLOSE
+            self.hwnd = None
+
+class ClipboardWatcher:
+    def __init__(self, backend, debounce=0.15, timeout=0.5):
+        self.backend = backend
+        self.debounce = debounce
+        self.timeout = timeout
+        self.changes_seen = 0
+        self.changes_coalesced = 0
+
+    def changes(self, stop_event):
+        last_sequence = None
+        while not stop_event.is_set():
+            sequence = self.backend.wait_for_change(last_sequence, self.timeout)
+            if sequence == last_sequence:
+                continue
+            self.changes_seen += 1
+            while not stop_event.is_set():
+                newer = self.backend.wait_for_change(sequence, self.debounce)
+                if newer == sequence:
+                    break
+                sequence = newer
+                self.changes_seen += 1
+                self.changes_coalesced += 1
+            last_sequence = sequence
+            try:
+                text = self.backend.get_text()
+            except Exception as e:
+                logging.error("Failed to get clipboard text: %s", e)
+                continue
+            if text and not stop_event.is_set():
+                yield text
+
+_default_backend = None
+_default_backend_lock = threading.Lock()
+
+def default_backend():
+    global _default_backend
+    with _default_backend_lock:
+        if _default_backend is None:
+            _default_backend = Win32ClipboardBackend()
+        return _default_backend
+
+CF_HTML_HEADER = (
+    "Version:0.9\r\n"
+    "StartHTML:{:010d}\r\n"
+    "EndHTML:{:010d}\r\n"
+    "StartFragment:{:010d}\r\n"
+    "EndFragment:{:010d}\r\n"
+)
+CF_HTML_HEADER_SIZE = len(CF_HTML_HEADER.format(0, 0, 0, 0))
+CF_HTML_PREFIX = b"<html><body>\r\n<!--StartFragment-->"
+CF_HTML_SUFFIX = b"<!--EndFragment-->\r\n</body></html>"
+
+class CfHtmlBuilder:
+    def __init__(self):
+        # Slot 0 is the header, filled in by build() once the fragment size is known.
+        self.parts = [None, CF_HTML_PREFIX]
+        self.fragment_size = 0
+
+    def write(self, data):
+        if data:
+            self.parts.append(data)
+            self.fragment_size += len(data)
+
+    def write_text(self, text):
+        self.write(text.encode('utf-8'))
+
+    def build(self):
+        start_fragment = CF_HTML_HEADER_SIZE + len(CF_HTML_PREFIX)
+        end_fragment = start_fragment + self.fragment_size
+        end_html = end_fragment + len(CF_HTML_SUFFIX)
+        self.parts[0] = CF_HTML_HEADER.format(CF_HTML_HEADER_SIZE, end_html, start_fragment, end_fragment).encode('ascii')
+        self.parts.append(CF_HTML_SUFFIX)
+        payload = b"".join(self.parts)
+        self.parts = None
+        return payload
+
+@traced('clipboard.write')
+def set_clipboard_payload(cf_html, backend=None):
+    if not cf_html or not isinstance(cf_html, bytes):
+        raise ValueError("CF_HTML payload must be non-empty bytes")
     try:
-        win32clipboard.OpenClipboard()
-        if win32clipboard.IsClipboardFormatAvailable(win32clipboard.CF_UNICODETEXT):
-            text = win32clipboard.GetClipboardData(win32clipboard.CF_UNICODETEXT)
-            logging.info("Retrieved clipboard text")
-            return text
-        return None
+        (backend or default_backend()).set_html(cf_html)
+        logging.info("Set %s bytes of HTML to clipboard", len(cf_html))
     except Exception as e:
-        logging.error(f"Failed to get clipboard text: {e}")
-        return None
-    finally:
-        win32clipboard.CloseClipboard()
+        logging.error("Failed to set clipboard HTML: %s", e)
+        raise
 
 def validate_base64(data):
     try:
@@ -56,5 +246,5 @@ def validate_base64(data):
         base64.b64decode(data, validate=True)
         return True
     except Exception as e:
-        logging.error(f"Base64 validation failed: {e}")
-        return False
\ No newline at end of file
+        logging.error("Base64 validation failed: %s", e)
+        return False
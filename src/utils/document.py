@@ -0,0 +1,135 @@
+import concurrent.futures
+import html
+import io
+from src.config.settings import DOCX_EXPORT_CONFIG
+from src.utils.tracing import traced
+
+IMG_STYLE = "vertical-align: middle; margin: 2px 0;"
+
+def html_style(text_color, font_size):
+    return (
+        "<style>"
+        f"body {{color: {text_color}; font-family: Arial, sans-serif; font-size: {font_size}pt; line-height: 1.5;}}"
+        "p, div, span {color: inherit !important;}"
+        "img {vertical-align: middle; margin: 2px 0;}"
+        "</style>"
+    )
+
+def html_image(image):
+    return f'<img src="{image.data_uri()}" style="{IMG_STYLE}">'
+
+IMG_CLOSE = f'" style="{IMG_STYLE}">'.encode('ascii')
+
+def html_text(text):
+    return html.escape(text).replace('\n', '<br>')
+
+def clipboard_html_parts(images, original_text, equations, text_color, font_size, only_images=False, test_mode=False):
+    # Yields markup strings and, in place of each <img>, the artifact itself.
+    yield html_style(text_color, font_size)
+    if test_mode or (original_text and equations['matches']):
+        if only_images:
+            yield from images
+        else:
+            last_pos = 0
+            img_index = 0
+            for match in equations['matches']:
+                start, end = match['start'], match['end']
+                yield f'<span>{html_text(original_text[last_pos:start])}</span>'
+                if img_index < len(images):
+                    yield images[img_index]
+                    img_index += 1
+                last_pos = end
+            yield f'<span>{html_text(original_text[last_pos:])}</span>'
+    else:
+        for i, img in enumerate(images):
+            if i:
+                yield "<br>"
+            yield img
+
+@traced('html.build')
+def build_clipboard_html(images, original_text, equations, text_color, font_size, only_images=False, test_mode=False):
+    return "".join(part if isinstance(part, str) else html_image(part)
+                   for part in clipboard_html_parts(images, original_text, equations, text_color, font_size, only_images, test_mode))
+
+@traced('html.build_cf')
+def build_cf_html(images, original_text, equations, text_color, font_size, only_images=False, test_mode=False):
+    from src.utils.clipboard import CfHtmlBuilder
+    builder = CfHtmlBuilder()
+    for part in clipboard_html_parts(images, original_text, equations, text_color, font_size, only_images, test_mode):
+        if isinstance(part, str):
+            builder.write_text(part)
+        else:
+            # The memoized base64 bytes go into the payload as-is; only the final join copies them.
+            builder.write(f'<img src="data:{part.mime_type};base64,'.encode('ascii'))
+            builder.write(part.base64_bytes())
+            builder.write(IMG_CLOSE)
+    return builder.build()
+
+def build_html_document(images, original_text, equations, text_color, font_size, only_images=False):
+    fragment = build_clipboard_html(images, original_text, equations, text_color, font_size, only_images=only_images, test_mode=True)
+    return f'<!DOCTYPE html>\n<html><head><meta charset="utf-8"></head><body>\n{fragment}\n</body></html>\n'
+
+def png_streams(images, workers=None, progress=None, checkpoint=None):
+    # PNG bytes made for the clipboard are reused; the rest are encoded in parallel (Pillow drops the GIL while encoding).
+    streams = [None] * len(images)
+    rasters = [i for i, img in enumerate(images) if img.extension != 'png']
+    encoded = [i for i, img in enumerate(images) if img.extension == 'png']
+    done = 0
+    for i in rasters:
+        if checkpoint is not None:
+            checkpoint()
+        streams[i] = io.BytesIO(images[i].png_bytes())
+        done += 1
+        if progress is not None:
+            progress(done, len(images))
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers or DOCX_EXPORT_CONFIG['workers']) as executor:
+        futures = {executor.submit(images[i].png_bytes): i for i in encoded}
+        try:
+            for future in concurrent.futures.as_completed(futures):
+                streams[futures[future]] = io.BytesIO(future.result())
+                done += 1
+                if progress is not None:
+                    progress(done, len(images))
+                if checkpoint is not None:
+                    checkpoint()
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            raise
+    return streams
+
+@traced('docx.build')
+def build_docx(images, original_text, equations, font_size, only_images=False, workers=None, progress=None, checkpoint=None):
+    from docx import Document
+    from docx.shared import Pt
+    interleave = not only_images and bool(original_text)
+    if interleave:
+        images = images[:len(equations['matches'])]
+    total = len(images) * 2
+    encode_progress = (lambda done, _: progress(done, total)) if progress is not None else None
+    streams = png_streams(images, workers, encode_progress, checkpoint)
+    doc = Document()
+    if not interleave:
+        for i, stream in enumerate(streams):
+            doc.add_picture(stream, width=Pt(300))
+            if progress is not None:
+                progress(len(images) + i + 1, total)
+    else:
+        last_pos = 0
+        img_index = 0
+        for match in equations['matches']:
+            start, end = match['start'], match['end']
+            text_segment = original_text[last_pos:start].strip()
+            if text_segment:
+                doc.add_paragraph(text_segment).runs[0].font.size = Pt(font_size)
+            if img_index < len(streams):
+                if checkpoint is not None:
+                    checkpoint()
+                doc.add_paragraph().add_run().add_picture(streams[img_index], width=Pt(300))
+                img_index += 1
+                if progress is not None:
+                    progress(len(images) + img_index, total)
+            last_pos = end
+        if remaining := original_text[last_pos:].strip():
+            doc.add_paragraph(remaining).runs[0].font.size = Pt(font_size)
+    return doc
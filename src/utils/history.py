@@ -0,0 +1,100 @@
+import threading
+import time
+from collections import OrderedDict
+
+class HistoryEntry:
+    __slots__ = ('id', 'text', 'equations', 'images', 'rendered', 'created')
+
+    def __init__(self, entry_id, text, equations, images, rendered):
+        self.id = entry_id
+        self.text = text
+        self.equations = equations
+        self.images = images
+        self.rendered = rendered
+        self.created = time.time()
+
+    def artifacts(self):
+        # images and rendered hold the same artifacts, and later entries reuse earlier ones.
+        unique = {id(artifact): artifact for artifact in self.images}
+        unique.update((id(artifact), artifact) for artifact in self.rendered.values())
+        return unique
+
+def compacted(images, rendered):
+    # Shared artifacts map to one shared copy, so images and rendered keep pointing at the same objects.
+    copies = {}
+
+    def copy(artifact):
+        if id(artifact) not in copies:
+            copies[id(artifact)] = artifact.compacted()
+        return copies[id(artifact)]
+
+    return [copy(artifact) for artifact in images], {key: copy(artifact) for key, artifact in rendered.items()}
+
+class RenderHistory:
+    def __init__(self, entries=8, memory_bytes=64 * 1024 * 1024):
+        self.max_entries = max(1, entries)
+        self.memory_bytes = memory_bytes
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+        self.latest_id = None
+        self.next_id = 0
+        self.evicted = 0
+
+    def add(self, text, equations, images, rendered):
+        images, rendered = compacted(images, rendered)
+        with self.lock:
+            self.next_id += 1
+            entry = HistoryEntry(self.next_id, text, equations, images, rendered)
+            self.entries[entry.id] = entry
+            self.latest_id = entry.id
+            self._evict()
+        return entry
+
+    def get(self, entry_id):
+        with self.lock:
+            entry = self.entries.get(entry_id)
+            if entry is not None:
+                self.entries.move_to_end(entry_id)
+            return entry
+
+    def latest(self):
+        return self.get(self.latest_id) if self.latest_id is not None else None
+
+    def compact(self):
+        # Exports decode pixels again; swap in fresh copies once the export is done.
+        with self.lock:
+            entries = list(self.entries.values())
+        for entry in entries:
+            images, rendered = compacted(entry.images, entry.rendered)
+            with self.lock:
+                entry.images, entry.rendered = images, rendered
+        with self.lock:
+            self._evict()
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.latest_id = None
+
+    def stats(self):
+        with self.lock:
+            return {
+                'entries': len(self.entries),
+                'equations': sum(len(entry.images) for entry in self.entries.values()),
+                'resident_bytes': self._resident_bytes(),
+                'memory_bytes': self.memory_bytes,
+                'evicted': self.evicted,
+            }
+
+    def _resident_bytes(self):
+        unique = {}
+        for entry in self.entries.values():
+            unique.update(entry.artifacts())
+        return sum(artifact.resident_bytes() for artifact in unique.values())
+
+    def _evict(self):
+        # The latest payload stays even when it alone is over budget: Save as DOCX needs it.
+        while len(self.entries) > 1 and (len(self.entries) > self.max_entries or self._resident_bytes() > self.memory_bytes):
+            oldest = next(key for key in self.entries if key != self.latest_id)
+            del self.entries[oldest]
+            self.evicted += 1
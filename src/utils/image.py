@@ -1,27 +1,370 @@
-import matplotlib.pyplot as plt
+from matplotlib.backend_bases import RendererBase
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.colors import to_rgba
+from matplotlib.figure import Figure
+from matplotlib.transforms import Affine2D, Bbox, IdentityTransform
 import numpy as np
 from PIL import Image
+import functools
 import io
 import logging
+import math
+import threading
 import subprocess
 import os
 import tempfile
+import json
+import re
+from src.config.settings import DVI_CACHE_CONFIG, FAST_MODE_CONFIG, PNG_ENCODING, RC_PARAMS, SVG_CONFIG
+from src.utils.artifact import DviArtifact, MaskArtifact, RenderedArtifact, SvgArtifact, tint_mask
+from src.utils.cache import RenderCache, render_cache_key
+from src.utils.latex import mathtext_blocker
+from src.utils.tracing import traced, tracer
 
-def image_to_bytes(image):
-    buffer = io.BytesIO()
-    image.save(buffer, format='PNG')
-    return buffer.getvalue()
+STANDALONE_TEMPLATE = r"""
+    \documentclass[preview]{standalone}
+    \usepackage{amsmath}
+    \usepackage{xcolor}
+    \begin{document}
+    \fontsize{%dpt}{%dpt}\selectfont
+    \color{%s}
+    $%s$
+    \end{document}
+    """
 
-def is_image_empty(image):
-    if image.mode != 'RGBA':
-        image = image.convert('RGBA')
-    img_array = np.array(image)
-    return np.sum(img_array[:, :, 3] > 0) < 100
+STANDALONE_BATCH_TEMPLATE = r"""
+    \documentclass[multi=true]{standalone}
+    \usepackage{amsmath}
+    \usepackage{xcolor}
+    \newenvironment{eqpage}{}{}
+    \standaloneenv{eqpage}
+    \begin{document}
+%s
+    \end{document}
+    """
+
+STANDALONE_BATCH_PAGE = r"\begin{eqpage}\fontsize{%dpt}{%dpt}\selectfont\color{%s}$%s$\end{eqpage}"
+
+def run_tool(args, check=True):
+    # Subprocess wall time gets its own span so latex/dvipng cost is separable from the Python around it.
+    with tracer.span(f"subprocess.{args[0]}"):
+        return subprocess.run(args, check=check, capture_output=True, text=True)
+
+# Compiled DVI per equation, color and point size: a new dpi or a smaller fit only needs dvipng again.
+tex_intermediates = RenderCache(**DVI_CACHE_CONFIG, name='dvi_cache')
+
+def run_latex(tex_path, output_dir, check=True):
+    return run_tool(["latex", "-interaction=nonstopmode", "-output-directory", output_dir, tex_path], check=check)
+
+MIN_INK_PIXELS = 100
+
+class ProcessedImage:
+    __slots__ = ('image', 'bbox', 'ink_pixels')
+
+    def __init__(self, image=None, bbox=None, ink_pixels=0):
+        self.image = image
+        self.bbox = bbox
+        self.ink_pixels = ink_pixels
+
+    @property
+    def is_empty(self):
+        return self.image is None or self.ink_pixels < MIN_INK_PIXELS
+
+# Modes whose renders come out of Agg as one color over a coverage mask; their cache entries are shared across colors.
+MASK_MODES = ("Matplotlib", "Fast")
+MASK_COLOR = "black"
+
+@functools.lru_cache(maxsize=64)
+def text_rgb(text_color):
+    # Agg rounds half up when it turns float colors into bytes.
+    return tuple(int(c * 255 + 0.5) for c in to_rgba(text_color)[:3])
+
+def tint_image(mask, text_color):
+    return tint_mask(mask, text_rgb(text_color)) if mask is not None else None
+
+def render_artifact(image, encoding):
+    if image is None:
+        return None
+    return MaskArtifact(image) if image.mode == 'L' else RenderedArtifact(image, encoding=encoding)
 
-def render_latex_to_image(latex_string, text_color, font_size, dpi, mode="Matplotlib"):
-    return render_latex_matplotlib(latex_string, text_color, font_size, dpi) if mode == "Matplotlib" else render_latex_standalone(latex_string, text_color, font_size, dpi)
+def matplotlib_preamble():
+    # --mathtext runs turn usetex off in the live rcParams; their renders must not share keys with TeX-typeset ones.
+    from matplotlib import rcParams
+    return json.dumps(dict(RC_PARAMS, **{'text.usetex': bool(rcParams['text.usetex'])}), sort_keys=True)
+
+def render_preamble(mode):
+    if mode == "Fast":
+        return json.dumps(FAST_MODE_CONFIG, sort_keys=True) + render_preamble(FAST_MODE_CONFIG['fallback'])
+    if mode == "SVG":
+        return SVG_CONFIG['engine'] + (STANDALONE_TEMPLATE if SVG_CONFIG['engine'] == 'dvisvgm' else matplotlib_preamble())
+    return matplotlib_preamble() if mode == "Matplotlib" else STANDALONE_TEMPLATE
+
+def render_key(latex_string, text_color, font_size, dpi, mode):
+    return render_cache_key(latex_string, text_color, font_size, dpi, mode, render_preamble(mode))
+
+def render_keys(equations, text_color, font_size, dpi, mode="Matplotlib"):
+    return [render_key(eq, text_color, font_size, dpi, mode) for eq in equations]
+
+@traced('render.equations')
+def render_equations(equations, text_color, font_size, dpi, mode="Matplotlib", cache=None, pool=None, encoding=None,
+                     chunk_size=None, checkpoint=None, progress=None, previous=None, keys=None, server=None):
+    encoding = PNG_ENCODING if encoding is None else encoding
+    keys = render_keys(equations, text_color, font_size, dpi, mode) if keys is None else keys
+    rgb = text_rgb(text_color) if mode in MASK_MODES else None
+    rendered = {}
+    pending = []
+    for eq, key in zip(equations, keys):
+        if key in rendered:
+            continue
+        # previous maps render keys to the artifacts of the last payload, so unchanged equations skip the cache too.
+        artifact = previous.get(key) if previous else None
+        if artifact is not None:
+            tracer.count('render.reused')
+        elif cache is not None:
+            # Masks are cached without a color; Fast mode's TeX fallback renders are cached per color.
+            if rgb is not None:
+                mask = cache.get(render_key(eq, None, font_size, dpi, mode), count_miss=mode != "Fast")
+                artifact = mask.tinted(rgb, encoding) if mask is not None else None
+            if artifact is None and mode != "Matplotlib":
+                artifact = cache.get(key)
+        rendered[key] = artifact
+        if artifact is None:
+            pending.append((key, eq))
+    tracer.count('render.equations', len(equations))
+    tracer.count('render.rendered', len(pending))
+    chunk_size = chunk_size or len(pending) or 1
+    done = len(rendered) - len(pending)
+    for start in range(0, len(pending), chunk_size):
+        # Cancellation and progress only happen between chunks; a chunk is one pool map or one latex batch.
+        if checkpoint is not None:
+            checkpoint()
+        chunk = pending[start:start + chunk_size]
+        chunk_equations = [eq for _, eq in chunk]
+        # The render server keeps the shared disk cache itself; locally the artifacts only go to memory.
+        artifacts = server.render(chunk_equations, text_color, font_size, dpi, mode) if server is not None else None
+        from_server = artifacts is not None
+        if from_server:
+            tracer.count('render.server', len(chunk))
+        elif mode == "SVG":
+            artifacts = [render_latex_svg(eq, text_color, font_size, dpi) for eq in chunk_equations]
+        else:
+            if mode == "Matplotlib":
+                images = render_matplotlib_many(chunk_equations, font_size, dpi, pool)
+            elif mode == "Fast":
+                images = render_fast_many(chunk_equations, text_color, font_size, dpi, pool)
+            else:
+                images = render_latex_standalone_batch(chunk_equations, text_color, font_size, dpi)
+            artifacts = [render_artifact(img, encoding) for img in images]
+        for (key, eq), artifact in zip(chunk, artifacts):
+            if artifact is None:
+                tracer.count('render.failures')
+                continue
+            if isinstance(artifact, MaskArtifact):
+                if cache is not None:
+                    cache.put(render_key(eq, None, font_size, dpi, mode), artifact, disk=not from_server)
+                artifact = artifact.tinted(rgb, encoding)
+            elif cache is not None:
+                cache.put(key, artifact, disk=not from_server)
+            rendered[key] = artifact
+        done += len(chunk)
+        if progress is not None:
+            progress(done, len(rendered))
+    if mode == "SVG":
+        for eq, key in zip(equations, keys):
+            if rendered[key] is not None and rendered[key].raster is None:
+                rendered[key].raster = svg_raster_fallback(eq, text_color, font_size, dpi)
+    return [rendered[key] for key in keys]
+
+@traced('render.matplotlib_many')
+def render_matplotlib_many(latex_strings, font_size, dpi, pool=None, mathtext=False):
+    if pool is not None and pool.enabled and len(latex_strings) > 1:
+        try:
+            return pool.map([(eq, font_size, dpi) for eq in latex_strings], mathtext=mathtext)
+        except Exception as e:
+            logging.error("Render pool failed, rendering in-process: %s", e)
+    render = render_mathtext_mask if mathtext else render_matplotlib_mask
+    return [render(eq, font_size, dpi) for eq in latex_strings]
+
+@traced('render.fast_many')
+def render_fast_many(latex_strings, text_color, font_size, dpi, pool=None):
+    images = [None] * len(latex_strings)
+    mathtext = []
+    for i, eq in enumerate(latex_strings):
+        blocker = mathtext_blocker(eq)
+        if blocker is None:
+            mathtext.append(i)
+        else:
+            logging.debug("Routing %r to %s: mathtext cannot lay out %s", eq, FAST_MODE_CONFIG['fallback'], blocker)
+    if mathtext:
+        with tracer.span('route.mathtext', equations=len(mathtext)):
+            drawn = render_matplotlib_many([latex_strings[i] for i in mathtext], font_size, dpi, pool, mathtext=True)
+        for i, image in zip(mathtext, drawn):
+            images[i] = image
+    tex = [i for i, image in enumerate(images) if image is None]
+    drawn_count = len(latex_strings) - len(tex)
+    tracer.count('route.mathtext', drawn_count)
+    tracer.count('route.tex', len(latex_strings) - len(mathtext))
+    tracer.count('route.fallback', len(mathtext) - drawn_count)
+    if tex:
+        tex_strings = [latex_strings[i] for i in tex]
+        with tracer.span('route.tex', equations=len(tex)):
+            if FAST_MODE_CONFIG['fallback'] == "Matplotlib":
+                drawn = render_matplotlib_many(tex_strings, font_size, dpi, pool)
+            else:
+                drawn = render_latex_standalone_batch(tex_strings, text_color, font_size, dpi)
+        for i, image in zip(tex, drawn):
+            images[i] = image
+    return images
+
+def cap_scale(width, height, dpi):
+    if width <= 0 or height <= 0:
+        return 1.0
+    padding = max(5, dpi // 20)
+    return min(1.0, (1800 - 2 * padding) / width, (600 - 2 * padding) / height)
+
+def scaled_size(width, height):
+    if width > 1800 or height > 600:
+        aspect = width / height
+        return (1800 if width > 1800 else aspect * 600), (600 if height > 600 else 1800 / aspect)
+    return width, height
+
+@traced('postprocess')
+def post_process(pixels, dpi, resize=True):
+    if isinstance(pixels, Image.Image):
+        pixels = np.asarray(pixels if pixels.mode in ('RGBA', 'L') else pixels.convert('RGBA'))
+    # A 2-D array is a coverage mask and comes back as an 'L' image.
+    alpha = pixels[:, :, 3] if pixels.ndim == 3 else pixels
+    row_ink = np.count_nonzero(alpha, axis=1)
+    rows = np.flatnonzero(row_ink)
+    if not rows.size:
+        return ProcessedImage()
+    top, bottom = int(rows[0]), int(rows[-1]) + 1
+    cols = np.flatnonzero(alpha[top:bottom].any(axis=0))
+    left, right = int(cols[0]), int(cols[-1]) + 1
+    height, width = alpha.shape
+    padding = max(5, dpi // 20)
+    crop = pixels[max(0, top - padding):min(height, bottom + padding), max(0, left - padding):min(width, right + padding)]
+    img = Image.fromarray(np.ascontiguousarray(crop))
+    ink_pixels = int(row_ink.sum())
+    if resize and (img.width > 1800 or img.height > 600):
+        new_width, new_height = scaled_size(img.width, img.height)
+        img = img.resize((int(new_width), int(new_height)), Image.LANCZOS)
+        ink_pixels = np.count_nonzero(np.asarray(img.getchannel('A') if img.mode == 'RGBA' else img))
+    return ProcessedImage(img, (left, top, right, bottom), ink_pixels)
+
+def finish_image(pixels, dpi):
+    processed = post_process(pixels, dpi)
+    return None if processed.is_empty else processed.image
+
+def finish_fitted(rasterize, resolution, dpi):
+    # Vector sources are drawn again smaller rather than resampled when they would exceed the size cap.
+    processed = post_process(rasterize(resolution), dpi, resize=False)
+    if processed.is_empty:
+        return None
+    left, top, right, bottom = processed.bbox
+    scale = cap_scale(right - left, bottom - top, dpi)
+    if scale < 1:
+        tracer.count('render.refit')
+        processed = post_process(rasterize(max(1, int(resolution * scale))), dpi)
+    return None if processed.is_empty else processed.image
+
+PYPLOT_FIGSIZE = (12, 3)
+
+class AggEquationRenderer:
+    def __init__(self):
+        self.figure = Figure(figsize=PYPLOT_FIGSIZE, dpi=100)
+        self.figure.patch.set_alpha(0)
+        self.canvas = FigureCanvasAgg(self.figure)
+        self.text = self.figure.text(0, 0, "", ha='center', va='center', transform=IdentityTransform())
+
+    def render(self, latex_string, text_color, font_size, dpi, usetex=None, fontset=None):
+        scaled_font_size = font_size * (dpi / 100)
+        # None falls back to rcParams, so the thread's renderer serves usetex and mathtext renders alike.
+        self.text.set_usetex(usetex)
+        self.text.set_math_fontfamily(fontset)
+        self.text.set_text(f"${latex_string}$")
+        self.text.set_fontsize(scaled_font_size)
+        self.text.set_color(text_color)
+        extent = self.layout(dpi)
+        pixels = self.draw(extent, dpi, scaled_font_size)
+        # The layout box includes ascent and descent, so only bother measuring ink when the box is over the cap.
+        if cap_scale(extent.width, extent.height, dpi) < 1:
+            alpha = pixels[:, :, 3]
+            rows = np.flatnonzero(alpha.any(axis=1))
+            cols = np.flatnonzero(alpha.any(axis=0))
+            scale = cap_scale(cols[-1] - cols[0] + 1, rows[-1] - rows[0] + 1, dpi) if rows.size else 1.0
+            if scale < 1:
+                # Past the size cap, draw the same text at a lower figure dpi instead of resampling afterwards.
+                # The point size stays put, so usetex reuses the DVI it already compiled.
+                tracer.count('render.refit')
+                render_dpi = max(1, int(dpi * scale))
+                pixels = self.draw(self.layout(render_dpi), render_dpi, scaled_font_size, pad_dpi=dpi)
+        return pixels
+
+    def draw(self, extent, dpi, scaled_font_size, pad_dpi=None):
+        # A refit draw keeps the padding of the requested dpi, which post_process crops to.
+        pad_dpi = dpi if pad_dpi is None else pad_dpi
+        anchor_x, anchor_y = PYPLOT_FIGSIZE[0] * dpi / 2, PYPLOT_FIGSIZE[1] * dpi / 2
+        # Page that savefig(bbox_inches='tight', pad_inches=0.05) would produce for the 12x3in figure.
+        page = Bbox.union([Bbox.from_bounds(0, 0, *PYPLOT_FIGSIZE), extent.transformed(Affine2D().scale(dpi).inverted())]).padded(0.05 * (pad_dpi / dpi))
+        page_width, page_height = page.width * dpi, page.height * dpi
+        offset_x, offset_y = page.x0 * dpi, page.y0 * dpi
+        # Rasterize only a window of that page around the text. Offsets stay even so
+        # round-half-even glyph placement lands on the same pixels as the full page.
+        margin = max(5, pad_dpi // 20) + int(scaled_font_size * dpi / 72 / 4)
+        left = max(0, int(extent.x0 - offset_x) - margin) & ~1
+        top = max(0, int(page_height - (extent.y1 - offset_y)) - margin) & ~1
+        right = min(int(page_width), int(math.ceil(extent.x1 - offset_x)) + margin)
+        bottom_cut = max(0, int(page_height - math.ceil(page_height - (extent.y0 - offset_y)) - margin))
+        # Keep the fractional part of the page height: Agg flips y against it when placing glyphs.
+        self.figure.set_size_inches((right - left) / dpi, (page_height - top - bottom_cut) / dpi)
+        height = self.figure.bbox.height
+        self.text.set_position((anchor_x - offset_x - left, height - (page_height - (anchor_y - offset_y)) + top))
+        self.canvas.draw()
+        return np.asarray(self.canvas.buffer_rgba())
+
+    def layout(self, dpi):
+        self.figure.set_dpi(dpi)
+        self.text.set_position((PYPLOT_FIGSIZE[0] * dpi / 2, PYPLOT_FIGSIZE[1] * dpi / 2))
+        return self.text.get_window_extent(self.canvas.get_renderer())
+
+agg_renderers = threading.local()
+
+def agg_renderer():
+    renderer = getattr(agg_renderers, 'renderer', None)
+    if renderer is None:
+        renderer = agg_renderers.renderer = AggEquationRenderer()
+    return renderer
+
+@traced('render.matplotlib')
+def render_matplotlib_mask(latex_string, font_size, dpi):
+    try:
+        return finish_image(agg_renderer().render(latex_string, MASK_COLOR, font_size, dpi)[:, :, 3], dpi)
+    except Exception as e:
+        logging.error("Matplotlib render failed: %s", e)
+        return None
+
+@traced('render.mathtext')
+def render_mathtext_mask(latex_string, font_size, dpi):
+    try:
+        pixels = agg_renderer().render(latex_string, MASK_COLOR, font_size, dpi, usetex=False, fontset=FAST_MODE_CONFIG['fontset'])
+        return finish_image(pixels[:, :, 3], dpi)
+    except ValueError as e:
+        # Mathtext parse errors are ValueErrors; the caller hands the equation to TeX.
+        logging.debug("Mathtext cannot draw %r: %s", latex_string, e)
+    except Exception as e:
+        logging.error("Mathtext render failed: %s", e)
+    return None
 
 def render_latex_matplotlib(latex_string, text_color, font_size, dpi):
+    return tint_image(render_matplotlib_mask(latex_string, font_size, dpi), text_color)
+
+def render_latex_mathtext(latex_string, text_color, font_size, dpi):
+    return tint_image(render_mathtext_mask(latex_string, font_size, dpi), text_color)
+
+@traced('render.matplotlib_pyplot')
+def render_latex_matplotlib_pyplot(latex_string, text_color, font_size, dpi):
+    import matplotlib.pyplot as plt
     try:
         scaled_font_size = font_size * (dpi / 100)
         fig = plt.figure(figsize=(12, 3), dpi=dpi)
@@ -32,57 +375,199 @@ def render_latex_matplotlib(latex_string, text_color, font_size, dpi):
         plt.savefig(buffer, format='png', dpi=dpi, transparent=True, bbox_inches='tight', pad_inches=0.05)
         plt.close(fig)
         buffer.seek(0)
-        img = Image.open(buffer).convert("RGBA")
-        bbox = img.getbbox()
-        if not bbox:
+        return finish_image(Image.open(buffer).convert("RGBA"), dpi)
+    except Exception as e:
+        logging.error("Matplotlib render failed: %s", e)
+        return None
+
+SVG_METADATA = {'Date': None, 'Creator': None, 'Format': None, 'Type': None}
+SVG_ROOT_PATTERN = re.compile(r'<svg\b[^>]*>')
+SVG_LENGTH_PATTERN = re.compile(r'\b(width|height)="([\d.]+)(pt)?"')
+SVG_INK_PATTERN = re.compile(r'<(use|path|rect)\b')
+
+def finish_svg(svg, dpi):
+    svg = svg[svg.index('<svg'):]
+    svg = re.sub(r'<metadata>.*?</metadata>|<!--.*?-->|<g id="patch_1">.*?</g>', '', svg, flags=re.DOTALL)
+    svg = re.sub(r'>\s+<', '><', svg)
+    if not SVG_INK_PATTERN.search(svg):
+        return None
+    root = SVG_ROOT_PATTERN.search(svg)
+    lengths = {name: float(value) for name, value, _ in SVG_LENGTH_PATTERN.findall(root.group(0))}
+    # Both engines measure in points; the PNG paths turn a point into dpi / 72 pixels and cap at 1800x600.
+    width, height = scaled_size(lengths['width'] * dpi / 72, lengths['height'] * dpi / 72)
+    sized = SVG_LENGTH_PATTERN.sub(lambda m: f'{m.group(1)}="{(width if m.group(1) == "width" else height):.1f}px"', root.group(0))
+    return SvgArtifact((svg[:root.start()] + sized + svg[root.end():]).encode('utf-8'))
+
+class InkExtentRenderer(RendererBase):
+    # Goes through the same text-to-path conversion as the SVG backend with svg.fonttype='path', but only
+    # records where the glyph outlines land, in points with y up.
+    def __init__(self, width, height):
+        super().__init__()
+        self.width = width
+        self.height = height
+        self.extents = []
+
+    def flipy(self):
+        return False
+
+    def get_canvas_width_height(self):
+        return self.width, self.height
+
+    def draw_path(self, gc, path, transform, rgbFace=None):
+        if len(path.vertices):
+            self.extents.append(path.get_extents(transform))
+
+def ink_extent(text):
+    renderer = InkExtentRenderer(*text.figure.bbox.size)
+    text.draw(renderer)
+    return Bbox.union(renderer.extents) if renderer.extents else None
+
+@traced('render.svg_matplotlib')
+def render_latex_matplotlib_svg(latex_string, text_color, font_size, dpi):
+    from matplotlib import rc_context
+    from matplotlib.backends.backend_svg import FigureCanvasSVG
+    try:
+        figure = Figure(figsize=PYPLOT_FIGSIZE, dpi=72)
+        FigureCanvasSVG(figure)
+        text = figure.text(0.5, 0.5, f"${latex_string}$", fontsize=font_size * (dpi / 100), color=text_color, ha='center', va='center')
+        ink = ink_extent(text)
+        if ink is None:
             return None
-        left, top, right, bottom = bbox
-        padding = max(5, dpi // 20)
-        img = img.crop((max(0, left - padding), max(0, top - padding), min(img.width, right + padding), min(img.height, bottom + padding)))
-        if img.width > 1800 or img.height > 600:
-            aspect = img.width / img.height
-            new_width = 1800 if img.width > 1800 else int(aspect * 600)
-            new_height = 600 if img.height > 600 else int(1800 / aspect)
-            img = img.resize((new_width, new_height), Image.LANCZOS)
-        return None if is_image_empty(img) else img
+        # Crop to the glyph outlines plus the PNG padding, as post_process does, rather than to the layout box
+        # bbox_inches='tight' would use; switching modes then keeps the pasted size and baseline. Past the size
+        # cap the ink shrinks like an Agg refit while the padding stays that of the requested dpi.
+        scale = cap_scale(ink.width * dpi / 72, ink.height * dpi / 72, dpi)
+        crop = ink.transformed(Affine2D().scale(1 / 72)).padded(max(5, dpi // 20) / (dpi * scale))
+        buffer = io.BytesIO()
+        with rc_context({'svg.hashsalt': SVG_CONFIG['hashsalt'], 'svg.fonttype': 'path'}):
+            figure.savefig(buffer, format='svg', transparent=True, bbox_inches=crop, metadata=SVG_METADATA)
+        return finish_svg(buffer.getvalue().decode('utf-8'), dpi * scale)
     except Exception as e:
-        logging.error(f"Matplotlib render failed: {e}")
+        logging.error("SVG render failed: %s", e)
         return None
 
-def render_latex_standalone(latex_string, text_color, font_size, dpi):
-    tex_template = r"""
-    \documentclass[preview]{standalone}
-    \usepackage{amsmath}
-    \usepackage{xcolor}
-    \begin{document}
-    \fontsize{%dpt}{%dpt}\selectfont
-    \color{%s}
-    $%s$
-    \end{document}
-    """
+@traced('render.svg_dvisvgm')
+def render_latex_dvisvgm(latex_string, text_color, font_size, dpi):
     try:
         with tempfile.TemporaryDirectory() as temp_dir:
             tex_path = os.path.join(temp_dir, "temp.tex")
             dvi_path = os.path.join(temp_dir, "temp.dvi")
-            png_path = os.path.join(temp_dir, "temp.png")
+            svg_path = os.path.join(temp_dir, "temp.svg")
             scaled_font_size = int(font_size * (dpi / 100))
             with open(tex_path, 'w', encoding='utf-8') as f:
-                f.write(tex_template % (scaled_font_size, int(scaled_font_size * 1.2), text_color, latex_string))
-            subprocess.run(["latex", "-interaction=nonstopmode", "-output-directory", temp_dir, tex_path], check=True, capture_output=True, text=True)
-            subprocess.run(["dvipng", "-D", str(dpi), "-T", "tight", "-bg", "Transparent", "-o", png_path, dvi_path], check=True, capture_output=True, text=True)
-            img = Image.open(png_path).convert("RGBA")
-            bbox = img.getbbox()
-            if not bbox:
-                return None
-            left, top, right, bottom = bbox
-            padding = max(5, dpi // 20)
-            img = img.crop((max(0, left - padding), max(0, top - padding), min(img.width, right + padding), min(img.height, bottom + padding)))
-            if img.width > 1800 or img.height > 600:
-                aspect = img.width / img.height
-                new_width = 1800 if img.width > 1800 else int(aspect * 600)
-                new_height = 600 if img.height > 600 else int(1800 / aspect)
-                img = img.resize((new_width, new_height), Image.LANCZOS)
-            return None if is_image_empty(img) else img
+                f.write(STANDALONE_TEMPLATE % (scaled_font_size, int(scaled_font_size * 1.2), text_color, latex_string))
+            run_latex(tex_path, temp_dir)
+            padding = max(5, dpi // 20) * 72 / dpi
+            run_tool(["dvisvgm", "--no-fonts", "--exact-bbox", f"--bbox={padding:.2f}pt", "-o", svg_path, dvi_path])
+            with open(svg_path, 'r', encoding='utf-8') as f:
+                return finish_svg(f.read(), dpi)
+    except Exception as e:
+        logging.error("dvisvgm render failed: %s", e)
+        return None
+
+def render_latex_svg(latex_string, text_color, font_size, dpi):
+    if SVG_CONFIG['engine'] == 'dvisvgm':
+        return render_latex_dvisvgm(latex_string, text_color, font_size, dpi)
+    return render_latex_matplotlib_svg(latex_string, text_color, font_size, dpi)
+
+def svg_raster_fallback(latex_string, text_color, font_size, dpi):
+    render = render_latex_standalone if SVG_CONFIG['engine'] == 'dvisvgm' else render_latex_matplotlib
+    return functools.partial(render, latex_string, text_color, font_size, dpi)
+
+def standalone_resolution(font_size, dpi):
+    # Equations are typeset at their point size; dvipng resolution carries the dpi/100 enlargement that used to go into the font size.
+    return max(1, round(int(font_size * (dpi / 100)) * dpi / font_size))
+
+def run_dvipng(dvi_path, png_path, resolution, page=None):
+    pages = ["-p", f"={page}", "-l", f"={page}"] if page is not None else []
+    run_tool(["dvipng", "-D", str(resolution), "-T", "tight", "-bg", "Transparent", *pages, "-o", png_path, dvi_path])
+    return Image.open(png_path).convert("RGBA")
+
+def cached_dvi(key, dvi_path):
+    intermediate = tex_intermediates.get(key)
+    if intermediate is None:
+        return False
+    with open(dvi_path, 'wb') as f:
+        f.write(intermediate.dvi)
+    return True
+
+def store_dvi(key, dvi_path):
+    with open(dvi_path, 'rb') as f:
+        tex_intermediates.put(key, DviArtifact(f.read()))
+
+@traced('render.standalone')
+def render_latex_standalone(latex_string, text_color, font_size, dpi):
+    try:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            tex_path = os.path.join(temp_dir, "temp.tex")
+            dvi_path = os.path.join(temp_dir, "temp.dvi")
+            png_path = os.path.join(temp_dir, "temp.png")
+            key = render_cache_key(latex_string, text_color, font_size, 0, "dvi", STANDALONE_TEMPLATE)
+            if not cached_dvi(key, dvi_path):
+                with open(tex_path, 'w', encoding='utf-8') as f:
+                    f.write(STANDALONE_TEMPLATE % (font_size, int(font_size * 1.2), text_color, latex_string))
+                run_latex(tex_path, temp_dir)
+                store_dvi(key, dvi_path)
+            rasterize = functools.partial(run_dvipng, dvi_path, png_path)
+            return finish_fitted(rasterize, standalone_resolution(font_size, dpi), dpi)
+    except Exception as e:
+        logging.error("Standalone render failed: %s", e)
+        return None
+
+def failed_batch_pages(log, count):
+    first_line = STANDALONE_BATCH_TEMPLATE.split('%s')[0].count('\n') + 1
+    failed = set()
+    for line_number in re.findall(r'^l\.(\d+)', log, re.MULTILINE):
+        index = int(line_number) - first_line
+        if not 0 <= index < count:
+            return None
+        failed.add(index)
+    if re.search(r'^! ', log, re.MULTILINE) and not failed:
+        return None
+    return failed
+
+@traced('render.standalone_batch')
+def render_latex_standalone_batch(latex_strings, text_color, font_size, dpi):
+    if len(latex_strings) < 2:
+        return [render_latex_standalone(eq, text_color, font_size, dpi) for eq in latex_strings]
+    try:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            tex_path = os.path.join(temp_dir, "batch.tex")
+            dvi_path = os.path.join(temp_dir, "batch.dvi")
+            log_path = os.path.join(temp_dir, "batch.log")
+            # Only batches that compiled cleanly are kept, so a cached one has no failed pages.
+            key = render_cache_key(json.dumps(latex_strings), text_color, font_size, 0, "dvi", STANDALONE_BATCH_TEMPLATE)
+            failed = set()
+            if not cached_dvi(key, dvi_path):
+                pages = "\n".join(
+                    STANDALONE_BATCH_PAGE % (font_size, int(font_size * 1.2), text_color, " ".join(eq.split()))
+                    for eq in latex_strings
+                )
+                with open(tex_path, 'w', encoding='utf-8') as f:
+                    f.write(STANDALONE_BATCH_TEMPLATE % pages)
+                run_latex(tex_path, temp_dir, check=False)
+                with open(log_path, 'r', encoding='utf-8', errors='replace') as f:
+                    failed = failed_batch_pages(f.read(), len(latex_strings))
+                if failed is None or not os.path.exists(dvi_path):
+                    raise RuntimeError("LaTeX errors could not be attributed to single equations")
+                if not failed:
+                    store_dvi(key, dvi_path)
+            resolution = standalone_resolution(font_size, dpi)
+            run_tool(["dvipng", "-D", str(resolution), "-T", "tight", "-bg", "Transparent", "-o", os.path.join(temp_dir, "page%d.png"), dvi_path])
+            page_paths = [os.path.join(temp_dir, f"page{i + 1}.png") for i in range(len(latex_strings))]
+            if not all(os.path.exists(path) for path in page_paths) or os.path.exists(os.path.join(temp_dir, f"page{len(latex_strings) + 1}.png")):
+                raise RuntimeError("Page count does not match equation count")
+            refit_path = os.path.join(temp_dir, "refit.png")
+
+            def page_rasterizer(page, path):
+                return lambda r: Image.open(path).convert("RGBA") if r == resolution else run_dvipng(dvi_path, refit_path, r, page)
+
+            images = [None if i in failed else finish_fitted(page_rasterizer(i + 1, path), resolution, dpi) for i, path in enumerate(page_paths)]
     except Exception as e:
-        logging.error(f"Standalone render failed: {e}")
-        return None
\ No newline at end of file
+        logging.error("Standalone batch render failed, rendering equations one by one: %s", e)
+        return [render_latex_standalone(eq, text_color, font_size, dpi) for eq in latex_strings]
+    if failed:
+        logging.info("Re-rendering %s failed equations individually", len(failed))
+        for i in failed:
+            images[i] = render_latex_standalone(latex_strings[i], text_color, font_size, dpi)
+    return images
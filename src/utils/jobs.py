@@ -0,0 +1,164 @@
+import collections
+import itertools
+import logging
+import queue
+import threading
+import time
+
+class JobCancelled(Exception):
+    pass
+
+class RenderJob:
+    __slots__ = ('id', 'kind', 'work', 'on_done', 'on_error', 'on_progress', 'post', 'cancel_event', 'superseded',
+                 'submitted_at', 'started_at', 'finished_at')
+
+    def __init__(self, job_id, kind, work, on_done, on_error, on_progress, post):
+        self.id = job_id
+        self.kind = kind
+        self.work = work
+        self.on_done = on_done
+        self.on_error = on_error
+        self.on_progress = on_progress
+        self.post = post
+        self.cancel_event = threading.Event()
+        self.superseded = False
+        self.submitted_at = time.perf_counter()
+        self.started_at = None
+        self.finished_at = None
+
+    @property
+    def cancelled(self):
+        return self.cancel_event.is_set()
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def checkpoint(self):
+        if self.cancel_event.is_set():
+            raise JobCancelled(f"Job {self.id} cancelled")
+
+    def progress(self, done, total):
+        if self.on_progress is not None and not self.cancelled:
+            self.post(self.on_progress, self, done, total)
+
+class RenderJobQueue:
+    def __init__(self, post, supersede_kinds=('clipboard',), history=200):
+        self.post = post
+        self.supersede_kinds = set(supersede_kinds)
+        self.jobs = queue.Queue()
+        self.lock = threading.Lock()
+        self.ids = itertools.count(1)
+        self.pending = []
+        self.running = None
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.cancelled = 0
+        self.superseded = 0
+        self.wait_times = collections.deque(maxlen=history)
+        self.run_times = collections.deque(maxlen=history)
+        self.stopped = False
+        self.thread = threading.Thread(target=self.dispatch, name="render-dispatcher", daemon=True)
+        self.thread.start()
+
+    def submit(self, kind, work, on_done=None, on_error=None, on_progress=None):
+        with self.lock:
+            job = RenderJob(next(self.ids), kind, work, on_done, on_error, on_progress, self.post)
+            if kind in self.supersede_kinds:
+                for stale in self.pending + ([self.running] if self.running else []):
+                    if stale.kind == kind and not stale.cancelled:
+                        stale.superseded = True
+                        stale.cancel()
+            self.pending.append(job)
+            self.submitted += 1
+        self.jobs.put(job)
+        return job
+
+    def cancel_running(self):
+        with self.lock:
+            job = self.running
+        if job is not None:
+            job.cancel()
+        return job
+
+    def cancel_all(self, kind=None):
+        with self.lock:
+            jobs = self.pending + ([self.running] if self.running else [])
+        for job in jobs:
+            if kind is None or job.kind == kind:
+                job.cancel()
+
+    def dispatch(self):
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                return
+            with self.lock:
+                self.pending.remove(job)
+                if job.cancelled:
+                    self._count_cancelled(job)
+                    continue
+                self.running = job
+            job.started_at = time.perf_counter()
+            try:
+                result = job.work(job)
+                job.checkpoint()
+            except JobCancelled:
+                self._finish(job, cancelled=True)
+                logging.info("%s job %s %s", job.kind.capitalize(), job.id, 'superseded' if job.superseded else 'cancelled')
+                continue
+            except Exception as e:
+                self._finish(job, failed=True)
+                logging.error("%s job %s failed: %s", job.kind.capitalize(), job.id, e)
+                if job.on_error is not None:
+                    self.post(job.on_error, job, e)
+                continue
+            self._finish(job)
+            if job.on_done is not None:
+                self.post(job.on_done, job, result)
+
+    def _finish(self, job, cancelled=False, failed=False):
+        job.finished_at = time.perf_counter()
+        with self.lock:
+            self.running = None
+            if cancelled:
+                self._count_cancelled(job)
+                return
+            if failed:
+                self.failed += 1
+            else:
+                self.completed += 1
+            self.wait_times.append(job.started_at - job.submitted_at)
+            self.run_times.append(job.finished_at - job.started_at)
+
+    def _count_cancelled(self, job):
+        if job.superseded:
+            self.superseded += 1
+        else:
+            self.cancelled += 1
+
+    def stats(self):
+        with self.lock:
+            waits = sorted(self.wait_times)
+            runs = sorted(self.run_times)
+            return {
+                'queue_depth': len(self.pending),
+                'running': self.running.kind if self.running else None,
+                'submitted': self.submitted,
+                'completed': self.completed,
+                'failed': self.failed,
+                'cancelled': self.cancelled,
+                'superseded': self.superseded,
+                'wait_p50_ms': waits[len(waits) // 2] * 1000 if waits else 0.0,
+                'wait_max_ms': waits[-1] * 1000 if waits else 0.0,
+                'run_p50_ms': runs[len(runs) // 2] * 1000 if runs else 0.0,
+                'run_max_ms': runs[-1] * 1000 if runs else 0.0,
+            }
+
+    def shutdown(self, timeout=1.0):
+        if self.stopped:
+            return
+        self.stopped = True
+        self.cancel_all()
+        self.jobs.put(None)
+        self.thread.join(timeout)
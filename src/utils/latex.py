@@ -1,53 +1,92 @@
 import re
-import logging
-import subprocess
-import os
-import matplotlib
-matplotlib.use('Agg')
-import matplotlib.pyplot as plt
-
-def check_latex():
-    try:
-        plt.figure()
-        plt.text(0.5, 0.5, r'$\alpha$', fontsize=12, ha='center', va='center')
-        plt.axis('off')
-        plt.savefig('test_latex.png', format='png', dpi=100, bbox_inches='tight')
-        plt.close()
-        if os.path.exists('test_latex.png'):
-            os.remove('test_latex.png')
-        else:
-            return False
-        subprocess.run(["latex", "--version"], check=True, capture_output=True, text=True)
-        subprocess.run(["dvipng", "--version"], check=True, capture_output=True, text=True)
-        return True
-    except Exception as e:
-        logging.error(f"LaTeX check failed: {e}")
-        return False
+from src.utils.tracing import traced
+
+DELIMITER_PATTERN = re.compile(r'\\\\|\\\$|\\\[|\\\(|\$\$|\$|\\begin\{(equation|align|gather)(\*?)\}')
+
+CLOSING_DELIMITERS = {
+    '\\[': ('\\]', True),
+    '\\(': ('\\)', False),
+    '$$': ('$$', True),
+    '$': ('$', False),
+}
+
+ENVIRONMENT_WRAPPERS = {
+    'equation': None,
+    'align': 'aligned',
+    'gather': 'gathered',
+}
+
+ENVIRONMENT_NOISE = re.compile(r'\\label\{[^{}]*\}|\\nonumber\b|\\notag\b')
 
+# Alignment, line breaks and environments parse in mathtext but do not lay out like TeX; the macros fail to parse anyway
+# and are listed so the common amsmath ones skip the attempt.
+MATHTEXT_BLOCKERS = re.compile(r'(?<!\\)[&$%]|\\\\|\\(?:begin|end|boxed|tag|label|color|textcolor|displaystyle|textstyle|limits|'
+                               r'[Bb]igg?[lr]?|tfrac|choose|over|xrightarrow|xleftarrow|underbrace|overbrace|pmod|bmod|implies|iff|'
+                               r'text(?:bf|it|rm)|mbox|stackrel|lVert|rVert)(?![A-Za-z])')
+
+def is_escaped(text, pos):
+    backslashes = 0
+    while pos > 0 and text[pos - 1] == '\\':
+        backslashes += 1
+        pos -= 1
+    return backslashes % 2 == 1
+
+def find_closing_delimiter(text, closer, pos, exhausted):
+    if pos >= exhausted.get(closer, len(text) + 1):
+        return -1
+    start = pos
+    while True:
+        found = text.find(closer, pos)
+        if found < 0:
+            exhausted[closer] = start
+            return -1
+        if closer[0] != '$' or not is_escaped(text, found):
+            return found
+        pos = found + 1
+
+@traced('detect')
 def find_latex_equations(text):
     if not text:
         return {'equations': [], 'matches': []}
-    patterns = [
-        (r'\\\[(.*?)\\\]', True),
-        (r'\\\((.*?)\\\)', False),
-        (r'\$\$(.*?)\$\$', True),
-        (r'\$(.*?)\$', False),
-        (r'\\begin\{equation\}(.*?)\\end\{equation\}', True)
-    ]
-    equations = []
     matches = []
-    for pattern, is_display in patterns:
-        for match in re.finditer(pattern, text, re.DOTALL):
-            equation = match.group(1).strip()
-            if equation:
-                cleaned = equation.replace('\n', ' ').strip()
-                equations.append(cleaned)
-                matches.append({
-                    'start': match.start(),
-                    'end': match.end(),
-                    'equation': cleaned,
-                    'is_display': is_display,
-                    'raw_match': match.group(0)
-                })
-    matches.sort(key=lambda x: x['start'])
-    return {'equations': [m['equation'] for m in matches], 'matches': matches}
\ No newline at end of file
+    exhausted = {}
+    pos = 0
+    while True:
+        opener = DELIMITER_PATTERN.search(text, pos)
+        if not opener:
+            break
+        token = opener.group(0)
+        if token in ('\\\\', '\\$'):
+            pos = opener.end()
+            continue
+        environment = opener.group(1)
+        if environment:
+            closer, is_display = f"\\end{{{environment}{opener.group(2)}}}", True
+        else:
+            closer, is_display = CLOSING_DELIMITERS[token]
+        close_start = find_closing_delimiter(text, closer, opener.end(), exhausted)
+        if close_start < 0:
+            pos = opener.end()
+            continue
+        end = close_start + len(closer)
+        equation = text[opener.end():close_start]
+        if environment:
+            equation = ENVIRONMENT_NOISE.sub('', equation)
+        cleaned = equation.replace('\n', ' ').strip()
+        if cleaned:
+            if environment and ENVIRONMENT_WRAPPERS[environment]:
+                wrapper = ENVIRONMENT_WRAPPERS[environment]
+                cleaned = f"\\begin{{{wrapper}}}{cleaned}\\end{{{wrapper}}}"
+            matches.append({
+                'start': opener.start(),
+                'end': end,
+                'equation': cleaned,
+                'is_display': is_display,
+                'raw_match': text[opener.start():end]
+            })
+        pos = end
+    return {'equations': [m['equation'] for m in matches], 'matches': matches}
+
+def mathtext_blocker(latex_string):
+    match = MATHTEXT_BLOCKERS.search(latex_string)
+    return match.group(0) if match else None
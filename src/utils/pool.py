@@ -0,0 +1,77 @@
+import concurrent.futures
+import logging
+import multiprocessing
+import threading
+from concurrent.futures.process import BrokenProcessPool
+from src.config.settings import configure_matplotlib
+from src.utils.tracing import traced
+
+WARMUP_EQUATION = r"\alpha + \frac{1}{2} = \sum_{i=0}^{n} x_i^2"
+
+def init_worker(usetex=True):
+    configure_matplotlib(usetex)
+    from src.utils.image import render_latex_matplotlib
+    render_latex_matplotlib(WARMUP_EQUATION, "black", 12, 100)
+
+def ping():
+    return True
+
+def render_job(job):
+    from src.utils.image import render_matplotlib_mask
+    return render_matplotlib_mask(*job)
+
+def render_mathtext_job(job):
+    from src.utils.image import render_mathtext_mask
+    return render_mathtext_mask(*job)
+
+class RenderPool:
+    def __init__(self, workers=2, max_tasks_per_child=100, enabled=True, usetex=True):
+        self.workers = max(1, workers)
+        self.max_tasks_per_child = max_tasks_per_child
+        self.enabled = enabled
+        self.usetex = usetex
+        self.lock = threading.Lock()
+        self.executor = None
+        self.jobs_since_start = 0
+
+    def start(self):
+        if not self.enabled:
+            return
+        with self.lock:
+            self._ensure_executor()
+
+    def _ensure_executor(self):
+        if self.executor is not None:
+            if self.jobs_since_start < self.workers * self.max_tasks_per_child:
+                return
+            logging.info("Recycling render pool workers")
+            self.executor.shutdown(wait=False)
+        self.executor = concurrent.futures.ProcessPoolExecutor(
+            max_workers=self.workers, mp_context=multiprocessing.get_context('spawn'), initializer=init_worker,
+            initargs=(self.usetex,)
+        )
+        self.jobs_since_start = 0
+        for _ in range(self.workers):
+            self.executor.submit(ping)
+        logging.info("Started render pool with %s workers", self.workers)
+
+    @traced('render.pool_map')
+    def map(self, jobs, mathtext=False):
+        with self.lock:
+            self._ensure_executor()
+            executor = self.executor
+            self.jobs_since_start += len(jobs)
+        try:
+            return list(executor.map(render_mathtext_job if mathtext else render_job, jobs))
+        except BrokenProcessPool as e:
+            logging.error("Render pool broke, restarting on next use: %s", e)
+            with self.lock:
+                if self.executor is executor:
+                    self.executor = None
+            raise
+
+    def shutdown(self):
+        with self.lock:
+            if self.executor is not None:
+                self.executor.shutdown(wait=False, cancel_futures=True)
+                self.executor = None
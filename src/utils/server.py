@@ -0,0 +1,354 @@
+import base64
+import collections
+import concurrent.futures
+import http.client
+import json
+import logging
+import os
+import queue
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from src.config.settings import RENDER_MODES
+
+MAX_REQUEST_BYTES = 8 * 1024 * 1024
+
+LOOPBACK_HOSTS = ('127.0.0.1', 'localhost', '::1')
+
+def request_host(host_header):
+    host = (host_header or "").strip().lower()
+    if host.startswith('['):
+        return host[1:].partition(']')[0]
+    return host.rpartition(':')[0] if host.count(':') == 1 else host
+
+def reject_request(headers, body=False):
+    # Browsers can send simple cross-origin POSTs and rebind DNS names to 127.0.0.1; scripts send neither an Origin
+    # nor a foreign Host, and the client always posts JSON.
+    if request_host(headers.get('Host')) not in LOOPBACK_HOSTS:
+        return 403, "Host must be a loopback address"
+    if headers.get('Origin') is not None:
+        return 403, "Cross-origin requests are not accepted"
+    if body and headers.get_content_type() != 'application/json':
+        return 415, "Content-Type must be application/json"
+    return None
+
+class IPv6HTTPServer(ThreadingHTTPServer):
+    address_family = socket.AF_INET6
+
+class RenderRequest:
+    __slots__ = ('equations', 'settings', 'future', 'received_at')
+
+    def __init__(self, equations, settings):
+        self.equations = equations
+        self.settings = settings
+        self.future = concurrent.futures.Future()
+        self.received_at = time.perf_counter()
+
+def parse_render_request(payload, usetex):
+    equations = payload.get('equations')
+    if not isinstance(equations, list) or not all(isinstance(eq, str) for eq in equations):
+        raise ValueError("equations must be a list of strings")
+    mode = payload.get('mode', "Matplotlib")
+    if mode not in RENDER_MODES:
+        raise ValueError(f"Unknown render mode: {mode}")
+    if payload.get('usetex', usetex) != usetex:
+        raise ValueError(f"Server renders with usetex={usetex}")
+    font_size, dpi = int(payload.get('font_size', 12)), int(payload.get('dpi', 300))
+    if not (10 <= font_size <= 50 and 100 <= dpi <= 600):
+        raise ValueError("Font size must be 10-50 and DPI 100-600")
+    return equations, (str(payload.get('text_color', "black")), font_size, dpi, mode), payload.get('masks') is True
+
+def artifact_payload(artifact, masks):
+    if artifact is None:
+        return None
+    # Clients that cache color-free masks ask for the coverage mask (a grayscale PNG) and tint it themselves.
+    mask = artifact.mask_artifact() if masks and hasattr(artifact, 'mask_artifact') else None
+    if mask is not None:
+        return base64.b64encode(mask.payload_bytes()).decode('ascii')
+    return artifact.base64()
+
+class RenderBatcher:
+    def __init__(self, cache, pool, window=0.005, max_batch=64):
+        self.cache = cache
+        self.pool = pool
+        self.window = window
+        self.max_batch = max_batch
+        self.requests = queue.Queue()
+        self.lock = threading.Lock()
+        self.batches = 0
+        self.batched_requests = 0
+        self.batched_equations = 0
+        self.render_times = collections.deque(maxlen=500)
+        self.thread = threading.Thread(target=self.run, name="render-batcher", daemon=True)
+        self.thread.start()
+
+    def submit(self, equations, settings):
+        request = RenderRequest(equations, settings)
+        self.requests.put(request)
+        return request.future
+
+    def collect(self, first):
+        # Requests that arrive within the window join the batch, so concurrent clients share one pool map or latex run.
+        batch = [first]
+        count = len(first.equations)
+        deadline = time.perf_counter() + self.window
+        while count < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                request = self.requests.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if request is None:
+                self.requests.put(None)
+                break
+            batch.append(request)
+            count += len(request.equations)
+        return batch
+
+    def run(self):
+        from src.utils.image import render_equations
+        while True:
+            first = self.requests.get()
+            if first is None:
+                return
+            groups = collections.defaultdict(list)
+            for request in self.collect(first):
+                groups[request.settings].append(request)
+            for settings, requests in groups.items():
+                equations = [eq for request in requests for eq in request.equations]
+                start = time.perf_counter()
+                try:
+                    artifacts = render_equations(equations, *settings, cache=self.cache, pool=self.pool)
+                except Exception as e:
+                    logging.error("Server batch of %s equations failed: %s", len(equations), e)
+                    for request in requests:
+                        request.future.set_exception(e)
+                    continue
+                with self.lock:
+                    self.batches += 1
+                    self.batched_requests += len(requests)
+                    self.batched_equations += len(equations)
+                    self.render_times.append(time.perf_counter() - start)
+                offset = 0
+                for request in requests:
+                    request.future.set_result(artifacts[offset:offset + len(request.equations)])
+                    offset += len(request.equations)
+
+    def stats(self):
+        with self.lock:
+            times = sorted(self.render_times)
+            return {
+                'batches': self.batches,
+                'requests': self.batched_requests,
+                'equations': self.batched_equations,
+                'mean_batch_equations': self.batched_equations / self.batches if self.batches else 0.0,
+                'render_p50_ms': times[len(times) // 2] * 1000 if times else 0.0,
+            }
+
+    def shutdown(self, timeout=1.0):
+        self.requests.put(None)
+        self.thread.join(timeout)
+
+class RenderRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        rejected = reject_request(self.headers)
+        if rejected is not None:
+            self.send_json(rejected[0], {'error': rejected[1]})
+            return
+        if self.path != '/health':
+            self.send_json(404, {'error': "Not found"})
+            return
+        self.send_json(200, self.server.render_server.health())
+
+    def do_POST(self):
+        rejected = reject_request(self.headers, body=True)
+        if rejected is not None:
+            # The body is left unread, so the connection cannot carry another request.
+            self.close_connection = True
+            self.send_json(rejected[0], {'error': rejected[1]})
+            return
+        if self.path != '/render':
+            self.send_json(404, {'error': "Not found"})
+            return
+        render_server = self.server.render_server
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            if length > MAX_REQUEST_BYTES:
+                raise ValueError("Request too large")
+            equations, settings, masks = parse_render_request(json.loads(self.rfile.read(length)), render_server.usetex)
+        except ValueError as e:
+            self.send_json(400, {'error': str(e)})
+            return
+        start = time.perf_counter()
+        try:
+            artifacts = render_server.batcher.submit(equations, settings).result(render_server.timeout)
+        except Exception as e:
+            self.send_json(500, {'error': str(e)})
+            return
+        self.send_json(200, {
+            'artifacts': [artifact_payload(artifact, masks) for artifact in artifacts],
+            'elapsed_ms': (time.perf_counter() - start) * 1000,
+        })
+
+    def send_json(self, status, payload):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logging.debug("%s - %s", self.address_string(), format % args)
+
+class RenderServer:
+    def __init__(self, host='127.0.0.1', port=8765, workers=2, usetex=True, cache=None, batch_window=0.005, max_batch=64,
+                 timeout=120.0):
+        from src.utils.cache import RenderCache
+        from src.utils.pool import RenderPool
+        self.usetex = usetex
+        self.timeout = timeout
+        self.started_at = time.time()
+        self.cache = cache if cache is not None else RenderCache()
+        self.pool = RenderPool(workers=workers, usetex=usetex)
+        self.batcher = RenderBatcher(self.cache, self.pool, batch_window, max_batch)
+        self.httpd = (IPv6HTTPServer if ':' in host else ThreadingHTTPServer)((host, port), RenderRequestHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.render_server = self
+
+    @property
+    def address(self):
+        return self.httpd.server_address[:2]
+
+    def warm_up(self):
+        from src.utils.pool import WARMUP_EQUATION
+        self.pool.start()
+        self.batcher.submit([WARMUP_EQUATION], ("black", 12, 100, "Matplotlib")).result(self.timeout)
+
+    def health(self):
+        return {
+            'ok': True,
+            'pid': os.getpid(),
+            'usetex': self.usetex,
+            'workers': self.pool.workers,
+            'uptime_s': time.time() - self.started_at,
+            'batcher': self.batcher.stats(),
+            'cache': self.cache.stats(),
+        }
+
+    def serve_forever(self):
+        logging.info("Render server listening on %s:%s", *self.address)
+        self.httpd.serve_forever()
+
+    def shutdown(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        self.batcher.shutdown()
+        self.pool.shutdown()
+
+class RenderClient:
+    def __init__(self, host='127.0.0.1', port=8765, timeout=120.0, connect_timeout=0.2, retry_after=10.0, usetex=True):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.retry_after = retry_after
+        self.usetex = usetex
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.available = False
+        self.probing = False
+        self.checked_at = None
+
+    def connection(self):
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            conn = http.client.HTTPConnection(self.host, self.port, timeout=self.connect_timeout)
+            conn.connect()
+            conn.sock.settimeout(self.timeout)
+            self.local.conn = conn
+        return conn
+
+    def close(self):
+        conn = getattr(self.local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self.local.conn = None
+
+    def request(self, method, path, body=None):
+        for attempt in range(2):
+            try:
+                conn = self.connection()
+                conn.request(method, path, body=body, headers={'Content-Type': 'application/json'} if body else {})
+                response = conn.getresponse()
+                return response.status, json.loads(response.read())
+            except (ConnectionError, http.client.RemoteDisconnected, http.client.CannotSendRequest) as e:
+                # A kept-alive connection the server closed fails on first use; reconnect once.
+                self.close()
+                if attempt:
+                    raise
+            except Exception:
+                self.close()
+                raise
+
+    def health(self):
+        status, payload = self.request('GET', '/health')
+        return payload if status == 200 else None
+
+    def probe(self):
+        try:
+            health = self.health()
+            available = bool(health) and health.get('usetex') == self.usetex
+        except Exception:
+            available = False
+        with self.lock:
+            if available and not self.available:
+                logging.info("Using render server at %s:%s", self.host, self.port)
+            self.available = available
+            self.probing = False
+            self.checked_at = time.monotonic()
+        return available
+
+    def is_available(self):
+        # Probing happens on a background thread so a missing server never delays a render.
+        with self.lock:
+            stale = self.checked_at is None or (not self.available and time.monotonic() - self.checked_at > self.retry_after)
+            if stale and not self.probing:
+                self.probing = True
+                threading.Thread(target=self.probe, name="render-server-probe", daemon=True).start()
+            return self.available
+
+    def mark_unavailable(self, reason):
+        logging.error("Render server unavailable, rendering in-process: %s", reason)
+        with self.lock:
+            self.available = False
+            self.checked_at = time.monotonic()
+
+    def render(self, equations, text_color, font_size, dpi, mode="Matplotlib"):
+        if not self.is_available():
+            return None
+        from src.utils.artifact import artifact_from_bytes
+        body = json.dumps({'equations': list(equations), 'text_color': text_color, 'font_size': font_size, 'dpi': dpi,
+                           'mode': mode, 'usetex': self.usetex, 'masks': True}).encode('utf-8')
+        try:
+            status, payload = self.request('POST', '/render', body)
+        except Exception as e:
+            self.mark_unavailable(e)
+            return None
+        if status != 200:
+            self.mark_unavailable(payload.get('error', status))
+            return None
+        return [artifact_from_bytes(base64.b64decode(data)) if data else None for data in payload['artifacts']]
+
+def default_client(usetex=True):
+    from src.config.settings import RENDER_SERVER_CONFIG
+    if not RENDER_SERVER_CONFIG['enabled']:
+        return None
+    return RenderClient(RENDER_SERVER_CONFIG['host'], RENDER_SERVER_CONFIG['port'], timeout=RENDER_SERVER_CONFIG['timeout'],
+                        connect_timeout=RENDER_SERVER_CONFIG['connect_timeout'], retry_after=RENDER_SERVER_CONFIG['retry_after'],
+                        usetex=usetex)
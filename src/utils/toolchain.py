@@ -0,0 +1,98 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+import subprocess
+import threading
+import time
+
+TOOLCHAIN_BINARIES = ('latex', 'dvipng')
+
+PROBE_EQUATION = r"\alpha"
+
+def toolchain_fingerprint():
+    parts = [os.environ.get('PATH', '')]
+    for name in TOOLCHAIN_BINARIES:
+        path = shutil.which(name)
+        parts.append([name, path, os.stat(path).st_mtime_ns if path else None])
+    return hashlib.sha256(json.dumps(parts).encode('utf-8')).hexdigest()
+
+def probe_toolchain():
+    versions = {}
+    for name in TOOLCHAIN_BINARIES:
+        result = subprocess.run([name, "--version"], check=True, capture_output=True, text=True)
+        versions[name] = result.stdout.splitlines()[0] if result.stdout else ""
+    from src.config.settings import configure_matplotlib
+    configure_matplotlib()
+    from src.utils.image import render_latex_matplotlib
+    if render_latex_matplotlib(PROBE_EQUATION, "black", 12, 100) is None:
+        raise RuntimeError("usetex test render failed")
+    return versions
+
+class ToolchainProbe:
+    def __init__(self, cache_file=None):
+        self.cache_file = cache_file
+        self.done = threading.Event()
+        self.ok = None
+        self.cached = False
+        self.versions = {}
+        self.error = None
+        self.elapsed = 0.0
+
+    def start(self, before=None):
+        thread = threading.Thread(target=self.run, args=(before,), daemon=True)
+        thread.start()
+        return thread
+
+    def run(self, before=None):
+        start = time.perf_counter()
+        try:
+            if before is not None:
+                before()
+            key = toolchain_fingerprint()
+            cached = self._load(key)
+            if cached is not None:
+                self.versions = cached
+                self.cached = True
+            else:
+                self.versions = probe_toolchain()
+                self._save(key)
+            self.ok = True
+        except Exception as e:
+            logging.error("LaTeX check failed: %s", e)
+            self.error = str(e)
+            self.ok = False
+        finally:
+            self.elapsed = time.perf_counter() - start
+            self.done.set()
+        return self.ok
+
+    def wait(self, timeout=None):
+        self.done.wait(timeout)
+        return self.ok
+
+    def _load(self, key):
+        if not self.cache_file:
+            return None
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logging.error("Ignoring unreadable toolchain cache: %s", e)
+            return None
+        return entry.get('versions') if entry.get('key') == key else None
+
+    def _save(self, key):
+        if not self.cache_file:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.cache_file) or '.', exist_ok=True)
+            tmp_path = f"{self.cache_file}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'key': key, 'versions': self.versions}, f, indent=2)
+            os.replace(tmp_path, self.cache_file)
+        except Exception as e:
+            logging.error("Toolchain cache write failed: %s", e)
@@ -0,0 +1,175 @@
+import collections
+import functools
+import json
+import logging
+import os
+import threading
+import time
+
+class NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+NULL_SPAN = NullSpan()
+
+class Span:
+    __slots__ = ('tracer', 'name', 'attrs', 'parent', 'start')
+
+    def __init__(self, tracer, name, attrs):
+        self.tracer = tracer
+        self.name = name
+        self.attrs = attrs
+
+    def __enter__(self):
+        stack = self.tracer.stack()
+        self.parent = stack[-1].name if stack else None
+        stack.append(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self.start
+        self.tracer.stack().pop()
+        if exc_type is not None:
+            self.attrs['error'] = exc_type.__name__
+        self.tracer.record(self, elapsed)
+        return False
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+class Tracer:
+    def __init__(self, path=None, max_bytes=10 * 1024 * 1024, history=500, enabled=False):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.history = history
+        self.enabled = enabled
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.file = None
+        self.durations = collections.defaultdict(lambda: collections.deque(maxlen=self.history))
+        self.totals = collections.defaultdict(lambda: [0, 0.0])
+        self.counters = collections.Counter()
+
+    def set_enabled(self, enabled):
+        self.enabled = bool(enabled)
+        if not self.enabled:
+            self.flush()
+
+    def stack(self):
+        stack = getattr(self.local, 'stack', None)
+        if stack is None:
+            stack = self.local.stack = []
+        return stack
+
+    def span(self, name, **attrs):
+        if not self.enabled:
+            return NULL_SPAN
+        return Span(self, name, attrs)
+
+    def count(self, name, n=1):
+        if self.enabled:
+            with self.lock:
+                self.counters[name] += n
+
+    def record(self, span, elapsed):
+        entry = {'ts': round(time.time(), 6), 'span': span.name, 'ms': round(elapsed * 1000, 3), 'thread': threading.current_thread().name}
+        if span.parent:
+            entry['parent'] = span.parent
+        entry.update(span.attrs)
+        line = json.dumps(entry, default=str) + "\n"
+        with self.lock:
+            self.durations[span.name].append(elapsed)
+            total = self.totals[span.name]
+            total[0] += 1
+            total[1] += elapsed
+            self._write(line)
+
+    def _write(self, line):
+        if not self.path:
+            return
+        try:
+            if self.file is None:
+                os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+                self.file = open(self.path, 'a', encoding='utf-8')
+            self.file.write(line)
+            if self.file.tell() > self.max_bytes:
+                self.file.close()
+                os.replace(self.path, f"{self.path}.1")
+                self.file = None
+        except Exception as e:
+            logging.error("Trace write failed, disabling tracing: %s", e)
+            self.enabled = False
+
+    def flush(self):
+        with self.lock:
+            if self.file is not None:
+                self.file.flush()
+
+    def close(self):
+        with self.lock:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+
+    def reset(self):
+        with self.lock:
+            self.durations.clear()
+            self.totals.clear()
+            self.counters.clear()
+
+    def summary(self):
+        with self.lock:
+            spans = {}
+            for name, samples in self.durations.items():
+                ordered = sorted(samples)
+                count, total = self.totals[name]
+                spans[name] = {
+                    'count': count,
+                    'total_ms': total * 1000,
+                    'p50_ms': ordered[len(ordered) // 2] * 1000,
+                    'p90_ms': ordered[min(len(ordered) - 1, int(len(ordered) * 0.9))] * 1000,
+                    'max_ms': ordered[-1] * 1000,
+                }
+            return {'spans': spans, 'counters': dict(self.counters)}
+
+tracer = Tracer()
+
+def configure_tracing(enabled, path=None, max_bytes=None, history=None):
+    if path is not None:
+        tracer.close()
+        tracer.path = path
+    if max_bytes is not None:
+        tracer.max_bytes = max_bytes
+    if history is not None:
+        tracer.history = history
+    tracer.set_enabled(enabled)
+    return tracer
+
+def traced(name):
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not tracer.enabled:
+                return func(*args, **kwargs)
+            with tracer.span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+def format_summary(summary):
+    lines = [f"{'span':<28}{'count':>7}{'p50 ms':>10}{'p90 ms':>10}{'max ms':>10}{'total ms':>11}"]
+    for name, row in sorted(summary['spans'].items(), key=lambda item: -item[1]['total_ms']):
+        lines.append(f"{name:<28}{row['count']:>7}{row['p50_ms']:>10.1f}{row['p90_ms']:>10.1f}{row['max_ms']:>10.1f}{row['total_ms']:>11.0f}")
+    if summary['counters']:
+        lines.append("")
+        lines.extend(f"{name:<28}{value:>7}" for name, value in sorted(summary['counters'].items()))
+    return "\n".join(lines)